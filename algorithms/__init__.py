@@ -1,4 +1,5 @@
 from .rwm import *
 from .pt_rwm import *
 from .rwm_gpu_optimized import *
-from .pt_rwm_gpu_optimized import *
\ No newline at end of file
+from .pt_rwm_gpu_optimized import *
+from .rwm_gpu_batched import *
\ No newline at end of file
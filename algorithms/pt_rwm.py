@@ -1,7 +1,25 @@
 import numpy as np
 from scipy.stats import multivariate_normal as normal
 from interfaces import MHAlgorithm, TargetDistribution
+from interfaces.numba_compat import njit, prange, NUMBA_AVAILABLE
 from algorithms import RandomWalkMH
+from algorithms.rwm import _rwm_loop
+
+
+@njit(parallel=True, cache=True)
+def _pt_local_moves(states, log_densities, std_devs, betas, log_density_fn, log_density_params,
+                    normals, uniforms, out_chains, out_accepts):
+    """Run normals.shape[1] local RWM steps for every replica in parallel.
+
+    The replicas are independent between swap attempts, so each one runs _rwm_loop on its own
+    thread with its own pre-drawn normals[k] and uniforms[k]. out_chains[k] receives the states
+    of replica k (row 0 is its current state), and states[k] and log_densities[k] are updated
+    to its final state and log density.
+    """
+    for k in prange(states.shape[0]):
+        log_densities[k] = _rwm_loop(states[k], log_densities[k], std_devs[k], betas[k],
+                                     log_density_fn, log_density_params,
+                                     normals[k], uniforms[k], out_chains[k], out_accepts[k:k + 1])
 
 
 class ParallelTemperingRWM(MHAlgorithm):
@@ -15,8 +33,9 @@ class ParallelTemperingRWM(MHAlgorithm):
             symmetric=True,
             beta_ladder=None,
             geom_temp_spacing=False,
-            swap_acceptance_rate=0.234,):
-        super().__init__(dim, var, target_dist, symmetric)
+            swap_acceptance_rate=0.234,
+            rng=None):
+        super().__init__(dim, var, target_dist, symmetric, rng=rng)
         self.name = "PTrwm"
         ### counting variables
         self.num_swap_attempts = 0
@@ -33,7 +52,7 @@ class ParallelTemperingRWM(MHAlgorithm):
 
         if self.beta_ladder is not None:
             for i in range(len(self.beta_ladder)):  # only if the temp ladder is not none
-                self.chains.append(RandomWalkMH(dim, var, target_dist, symmetric, beta=self.beta_ladder[i]))
+                self.chains.append(RandomWalkMH(dim, var, target_dist, symmetric, beta=self.beta_ladder[i], rng=self.rng))
 
         else:
             self.beta_ladder = []
@@ -45,7 +64,7 @@ class ParallelTemperingRWM(MHAlgorithm):
                 while curr_beta > beta_min:
                     self.beta_ladder.append(curr_beta)
                     # initialize one RWM algorithm for each beta
-                    self.chains.append(RandomWalkMH(dim, var, target_dist, symmetric, beta=self.beta_ladder[-1]))
+                    self.chains.append(RandomWalkMH(dim, var, target_dist, symmetric, beta=self.beta_ladder[-1], rng=self.rng))
                     curr_beta = curr_beta * c
                 
                 self.beta_ladder.append(beta_min)
@@ -64,6 +83,108 @@ class ParallelTemperingRWM(MHAlgorithm):
         """
         return self.name
     
+    def reset(self):
+        """Reset every replica to its initial state together with the swap counters."""
+        super().reset()
+        for chain in self.chains:
+            chain.reset()
+        self.chain = self.chains[0].chain
+        self.num_swap_attempts = 0
+        self.num_acceptances = 0
+        self.acceptance_rate = 0
+        self.step_counter = 0
+        self.squared_jump_distances = 0
+        self.pt_esjd = 0
+        self.log_target_density_curr_state = np.ones(len(self.beta_ladder)) * -np.inf
+
+    def preallocate_chain(self, num_iterations, dtype=None):
+        """Pre-allocate the chain of every replica; the cold chain stays aliased as self.chain."""
+        for chain in self.chains:
+            chain.preallocate_chain(num_iterations, dtype=dtype)
+        self.chain = self.chains[0].chain
+
+    def get_chain(self):
+        """Return the states of the cold chain so far."""
+        return self.chains[0].get_chain()
+
+    def can_run_compiled(self):
+        """The compiled local moves need Numba, a symmetric proposal and a target with a compiled log density."""
+        return NUMBA_AVAILABLE and self.symmetric and getattr(self.target_dist, 'log_density_njit', None) is not None
+
+    def run_compiled(self, num_iterations):
+        """Take num_iterations steps, running the local moves of all replicas in parallel.
+
+        Equivalent to calling step() num_iterations times. The steps between two swap steps
+        are local RWM moves only, so they run as one _pt_local_moves call over all replicas.
+        The current states and log densities are kept in float64 arrays across calls and swap
+        steps, so a reduced-precision chain is only written to, never read back.
+        """
+        for chain in self.chains:
+            if not isinstance(chain.chain, np.ndarray) or chain.chain.shape[0] < chain.num_states + num_iterations:
+                chain.preallocate_chain(num_iterations)
+        self.chain = self.chains[0].chain
+
+        log_density_fn = self.target_dist.log_density_njit
+        log_density_params = self.target_dist.log_density_params()
+        betas = np.asarray(self.beta_ladder, dtype=np.float64)
+        std_devs = np.sqrt(self.var / betas)
+        states = np.array([chain.get_curr_state() for chain in self.chains], dtype=np.float64)
+        log_densities = np.array([log_density_fn(state, log_density_params) for state in states])
+
+        remaining = num_iterations
+        while remaining > 0:
+            # Local moves up to (not including) the next swap step
+            num_local = min(remaining, self.swap_every - 1 - self.step_counter % self.swap_every)
+            if num_local > 0:
+                normals = self.rng.standard_normal((len(self.chains), num_local, self.dim))
+                uniforms = self.rng.random((len(self.chains), num_local))
+                out_chains = np.empty((len(self.chains), num_local + 1, self.dim))
+                out_accepts = np.zeros(len(self.chains), dtype=np.int64)
+                _pt_local_moves(states, log_densities, std_devs, betas, log_density_fn, log_density_params,
+                                normals, uniforms, out_chains, out_accepts)
+
+                for k, chain in enumerate(self.chains):
+                    chain.chain[chain.num_states:chain.num_states + num_local] = out_chains[k, 1:]
+                    self._record_local_moves(chain, num_local, log_densities[k], out_accepts[k])
+                self.step_counter += num_local
+                remaining -= num_local
+
+            if remaining > 0:
+                self._compiled_swap_step(states, log_densities, std_devs, log_density_fn, log_density_params)
+                remaining -= 1
+
+    def _compiled_swap_step(self, states, log_densities, std_devs, log_density_fn, log_density_params):
+        """Take a swap step as step() does, mirroring accepted swaps in states and log_densities."""
+        self.step_counter += 1
+        for j in range(len(self.chains) - 1):
+            self.chains[j].log_target_density_curr_state = log_densities[j]
+            self.chains[j + 1].log_target_density_curr_state = log_densities[j + 1]
+            num_acceptances = self.num_acceptances
+            self.attempt_swap(j, j + 1)
+            if self.num_acceptances > num_acceptances:
+                states[[j, j + 1]] = states[[j + 1, j]]
+                log_densities[[j, j + 1]] = log_densities[[j + 1, j]]
+
+        # The last replica takes a local move instead of swapping
+        k = len(self.chains) - 1
+        chain = self.chains[k]
+        out_accepts = np.zeros(1, dtype=np.int64)
+        log_densities[k] = _rwm_loop(
+            states[k], log_densities[k], std_devs[k], self.beta_ladder[k], log_density_fn, log_density_params,
+            self.rng.standard_normal((1, self.dim)), self.rng.random(1),
+            chain.chain[chain.num_states - 1:chain.num_states + 1], out_accepts
+        )
+        self._record_local_moves(chain, 1, log_densities[k], out_accepts[0])
+
+    @staticmethod
+    def _record_local_moves(chain, num_steps, log_density, num_accepts):
+        """Update the counters of a replica after num_steps compiled local moves."""
+        chain.num_states += num_steps
+        chain.log_target_density_curr_state = log_density
+        chain.num_steps += num_steps
+        chain.num_acceptances += int(num_accepts)
+        chain.acceptance_rate = chain.num_acceptances / chain.num_steps
+
     def construct_beta_ladder_iteratively(self):
         """Construct the inverse temperature ladder iteratively 
         using a simulation-based approach."""
@@ -72,7 +193,7 @@ class ParallelTemperingRWM(MHAlgorithm):
 
         while curr_beta > beta_min:
             self.beta_ladder.append(curr_beta)
-            self.chains.append(RandomWalkMH(self.dim, self.var, self.target_dist, self.symmetric, beta=self.beta_ladder[-1]))  # initialize one chain for each temperature
+            self.chains.append(RandomWalkMH(self.dim, self.var, self.target_dist, self.symmetric, beta=self.beta_ladder[-1], rng=self.rng))  # initialize one chain for each temperature
 
             ### Find the next inverse temperature beta
             rho_n = 0.5
@@ -129,7 +250,7 @@ class ParallelTemperingRWM(MHAlgorithm):
                 break
 
         self.beta_ladder.append(beta_min)
-        self.chains.append(RandomWalkMH(self.dim, self.var, self.target_dist, self.symmetric, beta=self.beta_ladder[-1]))
+        self.chains.append(RandomWalkMH(self.dim, self.var, self.target_dist, self.symmetric, beta=self.beta_ladder[-1], rng=self.rng))
         print("Finished constructing the temperature ladder.")
         print("Inverse temperature ladder: ", self.beta_ladder)
 
@@ -138,7 +259,7 @@ class ParallelTemperingRWM(MHAlgorithm):
         """Attempt to swap states between two chains based on Metropolis criteria."""
         swap_prob = min(1, np.exp(self.log_swap_prob(j, k)))
         self.num_swap_attempts += 1
-        if np.random.random() < swap_prob:
+        if self.rng.random() < swap_prob:
             # swap the states
             temp = self.chains[k].get_curr_state().copy()
             self.chains[k].set_curr_state(self.chains[j].get_curr_state().copy())
@@ -1,13 +1,62 @@
 import numpy as np
 from scipy.stats import multivariate_normal as normal
 from interfaces import MHAlgorithm, TargetDistribution
+from interfaces.numba_compat import njit, NUMBA_AVAILABLE
+
+# fastmath flags for the compiled kernels. 'nnan' and 'ninf' are left out because log densities
+# are -inf outside the support of bounded targets (Hypercube, IIDGamma, IIDBeta).
+KERNEL_FASTMATH = {'nsz', 'arcp', 'contract', 'afn', 'reassoc'}
+
+# Random numbers for the compiled loop are drawn in blocks of this many steps to bound memory
+RNG_BLOCK_SIZE = 2**16
+
+@njit(cache=True, fastmath=KERNEL_FASTMATH)
+def _rwm_loop(state, log_density, std_dev, beta, log_density_fn, log_density_params,
+              normals, uniforms, out_chain, out_accepts):
+    """Run len(normals) symmetric RWM steps from state, writing every state to out_chain.
+
+    normals (num_steps, dim) and uniforms (num_steps,) are the standard normal proposal draws
+    and the acceptance draws, generated in bulk by the caller. out_chain has num_steps + 1 rows,
+    row 0 receives the initial state, and state is updated in place to the final state.
+
+    log_density_fn(x, log_density_params) is the target's compiled log density (the
+    target's log_density_njit). Accepted proposals are counted in out_accepts[0].
+    States and log densities are computed in float64 whatever the dtype of out_chain.
+
+    The dim-length loops are written out explicitly over two state buffers that are swapped
+    on acceptance, so no array is allocated per step and LLVM can unroll and vectorize them
+    for the dimension at hand.
+
+    Returns:
+        float: The log target density of the final state.
+    """
+    dim = state.shape[0]
+    current_state = state.copy()
+    proposed_state = np.empty(dim)
+    current_log_density = log_density
+    out_chain[0] = current_state
+    for i in range(normals.shape[0]):
+        for j in range(dim):
+            proposed_state[j] = current_state[j] + std_dev * normals[i, j]
+        proposed_log_density = log_density_fn(proposed_state, log_density_params)
+        log_accept_ratio = beta * (proposed_log_density - current_log_density)
+        if log_accept_ratio > 0 or uniforms[i] < np.exp(log_accept_ratio):
+            current_state, proposed_state = proposed_state, current_state
+            current_log_density = proposed_log_density
+            out_accepts[0] += 1
+        for j in range(dim):
+            out_chain[i + 1, j] = current_state[j]
+    state[:] = current_state
+    return current_log_density
 
 class RandomWalkMH(MHAlgorithm):
     """Implementation of the Random Walk Metropolis-Hastings algorithm for sampling from a target distribution."""
-    def __init__(self, dim, var, target_dist: TargetDistribution = None, symmetric=True, beta=1.0, beta_ladder=None, swap_acceptance_rate=None):
+    def __init__(self, dim, var, target_dist: TargetDistribution = None, symmetric=True, beta=1.0, beta_ladder=None, swap_acceptance_rate=None,
+                 rng=None):
         """Initialize the RandomWalkMH algorithm. Note: the beta_ladder and swap_acceptance_rate are not used in this implementation,
-        this is due to higher-level code that uses the same interface for different algorithms."""
-        super().__init__(dim, var, target_dist, symmetric)
+        this is due to higher-level code that uses the same interface for different algorithms.
+        rng is the np.random.Generator used for proposals and acceptance draws (see MHAlgorithm)."""
+        super().__init__(dim, var, target_dist, symmetric, rng=rng)
         self.num_acceptances = 0    # use this to calculate acceptance rate
         self.acceptance_rate = 0
         self.log_target_density_curr_state = -np.inf    # this is the log density of the current state, used to reduce redundant computation
@@ -20,23 +69,71 @@ class RandomWalkMH(MHAlgorithm):
         """
         return self.name
 
+    def reset(self):
+        """Reset the chain to the initial state together with the acceptance counters."""
+        super().reset()
+        self.num_acceptances = 0
+        self.acceptance_rate = 0
+        self.log_target_density_curr_state = -np.inf
+
     def step(self):
         """Take a step using the Random Walk Metropolis-Hastings algorithm.
         Add the new state to the chain with probability min(1, A) where A is the acceptance probability.
         """
         # np.eye(self.dim) * (self.var) is the covariance matrix, 
-        proposed_state = np.random.multivariate_normal(self.chain[-1], (self.var / self.beta) * np.eye(self.dim))
+        current_state = self.get_curr_state()
+        # Isotropic Gaussian proposal with covariance (var / beta) * I
+        proposed_state = current_state + np.sqrt(self.var / self.beta) * self.rng.standard_normal(self.dim)
     
-        log_accept_ratio, log_target_density_proposed_state = self.log_accept_prob(proposed_state, self.log_target_density_curr_state, self.chain[-1])
+        log_accept_ratio, log_target_density_proposed_state = self.log_accept_prob(proposed_state, self.log_target_density_curr_state, current_state)
         # accept the proposed state with probability min(1, A)
-        if log_accept_ratio > 0 or np.random.random() < np.exp(log_accept_ratio):
-            self.chain.append(proposed_state)
+        if log_accept_ratio > 0 or self.rng.random() < np.exp(log_accept_ratio):
+            self.add_to_chain(proposed_state)
             self.log_target_density_curr_state = log_target_density_proposed_state
             self.num_acceptances += 1
-            self.acceptance_rate = self.num_acceptances / len(self.chain)
         else:
-            self.chain.append(self.chain[-1])
-            self.acceptance_rate = self.num_acceptances / len(self.chain)
+            self.add_to_chain(current_state)
+        self.num_steps += 1
+        self.acceptance_rate = self.num_acceptances / self.num_steps
+
+    def can_run_compiled(self):
+        """The compiled loop needs Numba, a symmetric proposal and a target with a compiled log density.
+
+        Without Numba the kernel would run as interpreted Python, which is slower than step().
+        """
+        return NUMBA_AVAILABLE and self.symmetric and getattr(self.target_dist, 'log_density_njit', None) is not None
+
+    def run_compiled(self, num_iterations):
+        """Take num_iterations steps with the compiled _rwm_loop kernel.
+
+        Equivalent to calling step() num_iterations times. The kernel writes directly into
+        the pre-allocated chain, which is allocated first if it has no room for the steps.
+        The proposal and acceptance draws come from self.rng in blocks of RNG_BLOCK_SIZE steps.
+        """
+        if not isinstance(self.chain, np.ndarray) or self.chain.shape[0] < self.num_states + num_iterations:
+            self.preallocate_chain(num_iterations)
+
+        log_density_fn = self.target_dist.log_density_njit
+        log_density_params = self.target_dist.log_density_params()
+        state = np.array(self.get_curr_state(), dtype=np.float64)
+        log_density = log_density_fn(state, log_density_params)
+        std_dev = np.sqrt(self.var / self.beta)
+
+        out_accepts = np.zeros(1, dtype=np.int64)
+        for block_start in range(0, num_iterations, RNG_BLOCK_SIZE):
+            block_size = min(RNG_BLOCK_SIZE, num_iterations - block_start)
+            normals = self.rng.standard_normal((block_size, self.dim))
+            uniforms = self.rng.random(block_size)
+            log_density = _rwm_loop(
+                state, log_density, std_dev, self.beta, log_density_fn, log_density_params,
+                normals, uniforms, self.chain[self.num_states - 1:self.num_states + block_size], out_accepts
+            )
+            self.num_states += block_size
+
+        self.log_target_density_curr_state = log_density
+        self.num_steps += num_iterations
+        self.num_acceptances += int(out_accepts[0])
+        self.acceptance_rate = self.num_acceptances / self.num_steps
 
     def log_accept_prob(self, proposed_state, log_target_density_curr_state, current_state):
         """Calculate the log acceptance probability for the proposed state given the current state.
@@ -0,0 +1,245 @@
+import torch
+import time
+from interfaces import MHAlgorithm, TargetDistribution, TorchTargetDistribution
+from algorithms.pt_rwm_gpu_optimized import ultra_fused_parallel_mcmc_step
+
+class RandomWalkMH_GPU_Batched(MHAlgorithm):
+    """
+    GPU-accelerated Random Walk Metropolis running many INDEPENDENT chains in lockstep.
+
+    Each chain has its own Normal proposal variance, so a whole parameter sweep over
+    proposal variances runs as a single sequence of batched steps instead of one full
+    simulation per variance. This keeps the GPU busy on small-dimensional targets where
+    a single chain cannot fill the device.
+
+    Key optimizations:
+    - One batched target density evaluation per step for all chains
+    - Fused acceptance decision and state update for all chains (JIT compiled)
+    - Pre-computed random numbers for the entire run
+    - Acceptance counts accumulated on the GPU (no per-step CPU synchronization)
+
+    Note: steps of the same chain are still sequential; only the chains are parallel.
+    """
+
+    def __init__(self, dim: int,
+                 variances,
+                 target_dist: TorchTargetDistribution | TargetDistribution = None,
+                 symmetric: bool = True,
+                 beta: float = 1.0,
+                 burn_in: int = 0,
+                 device: str = None,
+                 pre_allocate_steps: int = None,
+                 dtype: torch.dtype = torch.float32,
+                 rng_seed: int = None,
+                 chain_dtype: torch.dtype = None):
+        """Initialize the batched GPU RandomWalkMH algorithm.
+
+        Args:
+            dim: Dimension of the target distribution
+            variances: Sequence or 1-D tensor of Normal proposal variances, one per chain
+            target_dist: Target distribution to sample from (must support batched log_density)
+            symmetric: Whether proposal distribution is symmetric
+            beta: Temperature parameter (inverse), shared by all chains
+            burn_in: Number of initial samples to discard for MCMC burn-in (default: 0)
+            device: PyTorch device ('cuda', 'cpu', or None for auto-detect)
+            pre_allocate_steps: Pre-allocate memory for this many steps
+            dtype: Data type of the chain states
+            rng_seed: Seed for the algorithm's own RNG generator (Philox on CUDA). Every
+                draw is then fixed by the seed and its (step, chain, dimension) position.
+            chain_dtype: Storage data type of the chains (default: dtype), e.g. torch.bfloat16.
+                States and acceptance decisions stay in dtype; ESJD is computed in float32.
+        """
+        if not isinstance(target_dist, TorchTargetDistribution):
+            raise ValueError("RandomWalkMH_GPU_Batched requires a TorchTargetDistribution with batched log_density")
+
+        if device is None:
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        else:
+            self.device = torch.device(device)
+        self.dtype = dtype
+        self.chain_dtype = chain_dtype if chain_dtype is not None else dtype
+        self.rng_generator = torch.Generator(device=self.device)
+        if rng_seed is not None:
+            self.rng_generator.manual_seed(rng_seed)
+
+        variances = torch.as_tensor(variances, dtype=torch.float32).to(self.device).flatten()
+        if not (variances > 0).all():
+            raise ValueError("All proposal variances must be positive")
+        super().__init__(dim, variances, target_dist, symmetric)
+
+        self.num_chains = variances.shape[0]
+        self.name = "RWM_GPU_BATCHED_Normal"
+        self.beta = beta
+        self.beta_tensor = torch.tensor(beta, device=self.device, dtype=torch.float32)
+
+        # Per-chain proposal standard deviation, scaled by beta, broadcast over dimensions
+        self.std_devs = torch.sqrt(variances / beta).to(self.dtype).unsqueeze(-1)  # (num_chains, 1)
+
+        self.target_dist.to(self.device)
+        self.burn_in = max(0, burn_in)
+        self.total_steps = 0
+        self.num_acceptances = torch.zeros(self.num_chains, device=self.device, dtype=torch.long)
+
+        # Chain storage: (steps, num_chains, dim) so each step writes one contiguous block
+        self.pre_allocate_steps = pre_allocate_steps
+        if pre_allocate_steps:
+            total_allocation = self.burn_in + pre_allocate_steps + 1
+            self.pre_allocated_chain = torch.zeros(
+                (total_allocation, self.num_chains, dim),
+                device=self.device,
+                dtype=self.chain_dtype
+            )
+            self.chain_index = 0
+        else:
+            self.pre_allocated_chain = None
+            self.chain_index = None
+            self.gpu_chain = []
+
+        self.current_states = None
+        self.current_log_densities = None
+        self.precomputed_increments = None
+        self.precomputed_random_vals = None
+
+    def get_name(self):
+        return self.name
+
+    def reset(self):
+        """Reset the algorithm to initial state."""
+        super().reset()
+        self.total_steps = 0
+        self.num_acceptances.zero_()
+        self.current_states = None
+        self.current_log_densities = None
+        if self.pre_allocated_chain is not None:
+            self.chain_index = 0
+        else:
+            self.gpu_chain = []
+        self.precomputed_increments = None
+        self.precomputed_random_vals = None
+
+    def _initialize_states(self):
+        """Start every chain from the initial state chosen by MHAlgorithm."""
+        initial_state = torch.tensor(self.chain[-1], device=self.device, dtype=self.dtype)
+        self.current_states = initial_state.expand(self.num_chains, self.dim).clone()
+        self.current_log_densities = self.target_dist.log_density(self.current_states)
+        self._add_to_chain(self.current_states)
+
+    def _add_to_chain(self, states):
+        """Store the current states of all chains."""
+        if self.pre_allocated_chain is not None:
+            self.pre_allocated_chain[self.chain_index].copy_(states)
+            self.chain_index += 1
+        else:
+            self.gpu_chain.append(states.to(self.chain_dtype, copy=True))
+
+    def step(self, step_index: int = None):
+        """Take a single MCMC step for all chains."""
+        if self.current_states is None:
+            self._initialize_states()
+
+        if step_index is not None and self.precomputed_increments is not None:
+            increments = self.precomputed_increments[step_index]
+            random_vals = self.precomputed_random_vals[step_index]
+        else:
+            increments = torch.randn((self.num_chains, self.dim), device=self.device, dtype=self.dtype,
+                                     generator=self.rng_generator) * self.std_devs
+            random_vals = torch.rand(self.num_chains, device=self.device, generator=self.rng_generator)
+
+        proposals = self.current_states + increments
+        log_densities_proposed = self.target_dist.log_density(proposals)
+
+        self.current_states, self.current_log_densities, accept_flags = ultra_fused_parallel_mcmc_step(
+            self.current_states,
+            self.current_log_densities,
+            proposals,
+            log_densities_proposed,
+            random_vals,
+            self.beta_tensor
+        )
+        self.total_steps += 1
+
+        # Only count acceptances after burn-in period
+        if self.total_steps > self.burn_in:
+            self.num_acceptances += accept_flags
+
+        self._add_to_chain(self.current_states)
+
+    def generate_samples(self, num_samples: int):
+        """Generate samples for all chains.
+
+        Args:
+            num_samples: Number of samples per chain to generate (AFTER burn-in)
+
+        Returns:
+            Tensor of shape (num_samples, num_chains, dim) (EXCLUDING burn-in samples)
+        """
+        print(f"Generating {num_samples} samples (+ {self.burn_in} burn-in) for {self.num_chains} chains using batched GPU RWM")
+
+        total_steps = self.burn_in + num_samples
+        self._precompute_all_randoms(total_steps)
+
+        if self.current_states is None:
+            self._initialize_states()
+
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize()
+            start_event = torch.cuda.Event(enable_timing=True)
+            end_event = torch.cuda.Event(enable_timing=True)
+            start_event.record()
+
+        start_time = time.time()
+
+        for i in range(total_steps):
+            self.step(step_index=i)
+
+            if (i + 1) % 10000 == 0:
+                elapsed = time.time() - start_time
+                print(f"Generated {i + 1}/{total_steps} steps (Rate: {(i + 1) / elapsed:.1f} steps/sec)")
+
+        if self.device.type == 'cuda':
+            end_event.record()
+            torch.cuda.synchronize()
+            gpu_time = start_event.elapsed_time(end_event) / 1000.0
+            print(f"GPU kernel time: {gpu_time:.3f}s ({total_steps * self.num_chains / gpu_time:.1f} samples/sec)")
+
+        self.precomputed_increments = None
+        self.precomputed_random_vals = None
+
+        # Skip initial state + burn-in samples
+        return self.get_chains_gpu()[1 + self.burn_in:]
+
+    def _precompute_all_randoms(self, total_steps):
+        """Pre-compute proposal increments and acceptance uniforms for all chains."""
+        self.precomputed_increments = torch.randn(
+            (total_steps, self.num_chains, self.dim), device=self.device, dtype=self.dtype,
+            generator=self.rng_generator
+        )
+        self.precomputed_increments.mul_(self.std_devs)
+        self.precomputed_random_vals = torch.rand(
+            (total_steps, self.num_chains), device=self.device, dtype=torch.float32,
+            generator=self.rng_generator
+        )
+
+    def get_chains_gpu(self):
+        """Get all chains as a (steps, num_chains, dim) GPU tensor. Includes burn-in samples."""
+        if self.pre_allocated_chain is not None:
+            return self.pre_allocated_chain[:self.chain_index]
+        return torch.stack(self.gpu_chain)
+
+    def get_chain_gpu(self, chain_idx: int = 0):
+        """Get a single chain as a (steps, dim) GPU tensor. Includes burn-in samples."""
+        return self.get_chains_gpu()[:, chain_idx]
+
+    def acceptance_rates_gpu(self):
+        """Return the post-burn-in acceptance rate of every chain as a (num_chains,) tensor."""
+        post_burnin_steps = max(1, self.total_steps - self.burn_in)
+        return self.num_acceptances.to(torch.float32) / post_burnin_steps
+
+    def expected_squared_jump_distances_gpu(self):
+        """Return the post-burn-in ESJD of every chain as a (num_chains,) tensor."""
+        chains = self.get_chains_gpu()
+        if chains.shape[0] <= self.burn_in + 1:
+            raise ValueError(f"Insufficient post-burn-in samples: total_samples={chains.shape[0]}, burn_in={self.burn_in}. Need at least {self.burn_in + 2} total samples.")
+        chain_tensor = chains[self.burn_in:].to(torch.float32)
+        diff = chain_tensor[1:] - chain_tensor[:-1]
+        return torch.sum(diff * diff, dim=2).mean(dim=0)
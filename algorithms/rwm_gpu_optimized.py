@@ -5,6 +5,7 @@ import time
 from interfaces import MHAlgorithm, TargetDistribution, TorchTargetDistribution
 import warnings
 from proposal_distributions import ProposalDistribution, NormalProposal, LaplaceProposal, UniformRadiusProposal
+from target_distributions.multivariate_normal_torch import MultivariateNormalTorch
 
 @torch.jit.script
 def ultra_fused_mcmc_step_basic(current_state: torch.Tensor,
@@ -31,6 +32,33 @@ def ultra_fused_mcmc_step_basic(current_state: torch.Tensor,
     
     return new_state, new_log_density, accepted
 
+@torch.jit.script
+def mvn_fused_mcmc_step(current_state: torch.Tensor,
+                        current_log_density: torch.Tensor,
+                        increment: torch.Tensor,
+                        random_val: torch.Tensor,
+                        beta: torch.Tensor,
+                        mean: torch.Tensor,
+                        cov_inv: torch.Tensor,
+                        log_norm_const: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Fully fused MCMC step for a MultivariateNormalTorch target.
+    
+    The Gaussian log density of the proposal is computed inline, so the whole step
+    (proposal, log density, acceptance, state update) is a single scripted call. For
+    the small dimensions typical of these targets this avoids the per-op dispatch
+    overhead of calling the target's log_density from Python.
+    """
+    proposal = current_state + increment
+    centered = proposal - mean
+    log_density_proposed = log_norm_const - 0.5 * torch.dot(centered, torch.mv(cov_inv, centered))
+    
+    log_accept_ratio = beta * (log_density_proposed - current_log_density)
+    accepted = (log_accept_ratio > 0.0) | (random_val < torch.exp(log_accept_ratio))
+    new_state = torch.where(accepted, proposal, current_state)
+    new_log_density = torch.where(accepted, log_density_proposed, current_log_density)
+    
+    return new_state, new_log_density, accepted
+
 # Legacy functions kept for compatibility
 @torch.jit.script
 def fused_proposal_generation(current_state: torch.Tensor, 
@@ -76,6 +104,165 @@ def make_batch_acceptance_decisions(log_accept_ratios: torch.Tensor,
     """Make acceptance decisions for INDEPENDENT parallel chains."""
     return (log_accept_ratios > 0.0) | (random_vals < torch.exp(log_accept_ratios))
 
+def mh_step_with_log_density(log_density_fn, current_state: torch.Tensor,
+                             current_log_density: torch.Tensor,
+                             increment: torch.Tensor,
+                             random_val: torch.Tensor,
+                             beta: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """Complete MCMC step including the log density of the proposal, for torch.compile.
+    
+    Unlike ultra_fused_mcmc_step_basic (TorchScript), the target log density is part of
+    the traced graph, so TorchInductor can fuse proposal, density and acceptance.
+    """
+    proposal = current_state + increment
+    log_density_proposed = log_density_fn(proposal)
+    log_accept_ratio = beta * (log_density_proposed - current_log_density)
+    accepted = (log_accept_ratio > 0.0) | (random_val < torch.exp(log_accept_ratio))
+    new_state = torch.where(accepted, proposal, current_state)
+    new_log_density = torch.where(accepted, log_density_proposed, current_log_density)
+    return new_state, new_log_density, accepted
+
+# Compiled versions of mh_step_with_log_density, one per compile mode
+_compiled_mh_steps = {}
+
+def get_compiled_mh_step(compile_mode: str):
+    """Return mh_step_with_log_density compiled with torch.compile in the given mode.
+    
+    The compiled function is shared by all algorithm instances, so runs with the same target
+    and shapes (e.g. every configuration of a variance sweep) reuse the compiled graph.
+    """
+    if compile_mode not in _compiled_mh_steps:
+        _compiled_mh_steps[compile_mode] = torch.compile(mh_step_with_log_density, mode=compile_mode)
+    return _compiled_mh_steps[compile_mode]
+
+class _CUDAGraphBlock:
+    """A captured CUDA graph of one block of RWM steps together with its static tensors.
+    
+    The graph reads the state, log density, increments and uniforms from its static input
+    tensors and writes the visited states, log densities and acceptances to its static
+    output blocks, so a run copies its inputs in, replays and copies the outputs out.
+    """
+    
+    def __init__(self, target_dist, dim: int, block_size: int, device: torch.device,
+                 dtype: torch.dtype, beta: float):
+        self.target_dist = target_dist  # keeps the captured target (and its id) alive
+        self.state = torch.zeros(dim, device=device, dtype=dtype)
+        self.log_density = torch.zeros((), device=device, dtype=torch.float32)
+        self.beta = torch.tensor(beta, device=device, dtype=torch.float32)
+        self.increment_block = torch.zeros((block_size, dim), device=device, dtype=dtype)
+        self.random_block = torch.zeros(block_size, device=device, dtype=torch.float32)
+        self.state_block = torch.empty((block_size, dim), device=device, dtype=dtype)
+        self.log_density_block = torch.empty(block_size, device=device, dtype=torch.float32)
+        self.accept_block = torch.empty(block_size, device=device, dtype=torch.bool)
+        self.graph = None
+    
+    def run_block(self):
+        """Run the block of steps on the static tensors (the code that is captured)."""
+        for j in range(self.increment_block.shape[0]):
+            proposal = self.state + self.increment_block[j]
+            log_density_proposed = self.target_dist.log_density(proposal)
+            new_state, new_log_density, accepted = ultra_fused_mcmc_step_basic(
+                self.state, self.log_density, self.increment_block[j], self.random_block[j],
+                self.beta, log_density_proposed
+            )
+            self.state.copy_(new_state)
+            self.log_density.copy_(new_log_density.reshape(()))
+            self.state_block[j].copy_(self.state)
+            self.log_density_block[j].copy_(self.log_density)
+            self.accept_block[j].copy_(accepted.reshape(()))
+    
+    def capture(self, initial_state: torch.Tensor, initial_log_density: torch.Tensor):
+        """Warm up and capture the graph from a valid state. Raises RuntimeError on failure."""
+        device = self.state.device
+        self.state.copy_(initial_state)
+        self.log_density.copy_(initial_log_density.reshape(()))
+        # Warm up on a side stream (JIT specialization, allocator) before capturing
+        warmup_stream = torch.cuda.Stream(device=device)
+        warmup_stream.wait_stream(torch.cuda.current_stream(device))
+        with torch.cuda.stream(warmup_stream):
+            self.run_block()
+        torch.cuda.current_stream(device).wait_stream(warmup_stream)
+        
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph):
+            self.run_block()
+        self.graph = graph
+
+def get_cuda_graph_block(cache: dict, target_dist, dim: int, block_size: int, device: torch.device,
+                         dtype: torch.dtype, beta: float,
+                         initial_state: torch.Tensor, initial_log_density: torch.Tensor):
+    """Return the captured _CUDAGraphBlock for these settings on the current stream from cache.
+    
+    The cache is owned by the caller (a BufferPool or a single algorithm), so the graphs, their
+    memory pools and static tensors are freed with it. Blocks are keyed by target, shape, dtype
+    and stream: runs on the same stream are ordered, so they can safely share the static tensors.
+    A new block is captured from initial_state on first use. Raises RuntimeError if capture fails.
+    """
+    stream = torch.cuda.current_stream(device)
+    key = (id(target_dist), dim, block_size, device, dtype, beta, stream.cuda_stream)
+    if key not in cache:
+        block = _CUDAGraphBlock(target_dist, dim, block_size, device, dtype, beta)
+        block.capture(initial_state, initial_log_density)
+        cache[key] = block
+    return cache[key]
+
+class BufferPool:
+    """Pre-allocated GPU buffers shared by consecutive RandomWalkMH_GPU_Optimized runs.
+    
+    Parameter sweeps construct one algorithm per configuration with identical
+    (num_steps, dim) shapes. Allocating the chain, log density and random number
+    buffers once and letting every run rebind to them avoids allocating and freeing
+    the same large tensors for each configuration.
+    
+    Note: chains returned by an algorithm using the pool are views into these buffers
+    and are overwritten by the next run. Copy them out if they need to be kept.
+    
+    The chain buffer has the same (steps, dim) contiguous layout as an unpooled chain,
+    see RandomWalkMH_GPU_Optimized.
+    """
+    
+    def __init__(self, num_steps: int, dim: int, burn_in: int = 0,
+                 device: str = None, dtype: torch.dtype = torch.float32,
+                 chain_dtype: torch.dtype = None):
+        """Allocate the shared buffers.
+        
+        Args:
+            num_steps: Number of post-burn-in steps per run (same as pre_allocate_steps)
+            dim: Dimension of the target distribution
+            burn_in: Number of burn-in steps per run
+            device: PyTorch device ('cuda', 'cpu', or None for auto-detect)
+            dtype: Data type of the proposal increments (and of the chain by default)
+            chain_dtype: Storage data type of the chain (default: dtype)
+        """
+        if device is None:
+            self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        else:
+            self.device = torch.device(device)
+        self.dim = dim
+        self.dtype = dtype
+        self.chain_dtype = chain_dtype if chain_dtype is not None else dtype
+        
+        # The chain also stores the initial state, the random numbers do not
+        total_steps = max(0, burn_in) + num_steps
+        self.chain = torch.empty((total_steps + 1, dim), device=self.device, dtype=self.chain_dtype)
+        self.log_densities = torch.empty(total_steps + 1, device=self.device, dtype=torch.float32)
+        self.increments = torch.empty((total_steps, dim), device=self.device, dtype=dtype)
+        self.random_vals = torch.empty(total_steps, device=self.device, dtype=torch.float32)
+        # CUDA graphs captured by the runs using the pool, see get_cuda_graph_block
+        self.cuda_graph_blocks = {}
+    
+    def check_compatible(self, total_allocation: int, dim: int, device: torch.device, dtype: torch.dtype,
+                         chain_dtype: torch.dtype = None):
+        """Raise a ValueError if the pool cannot back a chain of total_allocation states."""
+        chain_dtype = chain_dtype if chain_dtype is not None else dtype
+        if (dim != self.dim or dtype != self.dtype or chain_dtype != self.chain_dtype or
+                device.type != self.device.type):
+            raise ValueError(f"BufferPool (dim={self.dim}, dtype={self.dtype}, chain_dtype={self.chain_dtype}, device={self.device}) "
+                             f"does not match algorithm (dim={dim}, dtype={dtype}, chain_dtype={chain_dtype}, device={device})")
+        if total_allocation > self.chain.shape[0]:
+            raise ValueError(f"BufferPool holds {self.chain.shape[0]} states but {total_allocation} are required")
+
+
 class RandomWalkMH_GPU_Optimized(MHAlgorithm):
     """
     Highly optimized GPU-accelerated Random Walk Metropolis implementation.
@@ -87,6 +274,13 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
     - Mixed precision support
     - Fused operations to reduce kernel launch overhead
     - Flexible proposal distributions (Normal, Laplace, UniformRadius)
+    
+    Memory layout: the pre-allocated chain is a contiguous (steps, dim) tensor, i.e. the
+    dimension is the stride-1 axis. Every step writes its state as one contiguous row with
+    chain[step].copy_(state), and slices such as chain[:, i] for plotting are strided
+    reads done once per run. Keep this layout (and the row-wise writes) when changing the
+    storage; an iteration-last layout would turn every step's write into dim scattered
+    single-element writes.
     """
     
     def __init__(self, dim: int, 
@@ -100,6 +294,11 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
                  use_efficient_rng: bool = True,
                  compile_mode: str = None,
                  proposal_distribution: ProposalDistribution = None,  # New parameter at end
+                 external_buffers: BufferPool = None,
+                 rng_seed: int = None,
+                 use_cuda_graph: bool = False,
+                 cuda_graph_block_size: int = 256,
+                 chain_dtype: torch.dtype = None,
                  ):
         """Initialize the optimized GPU RandomWalkMH algorithm.
         
@@ -113,8 +312,20 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
             device: PyTorch device ('cuda', 'cpu', or None for auto-detect)
             pre_allocate_steps: Pre-allocate memory for this many steps
             use_efficient_rng: Use more efficient random number generation
-            compile_mode: PyTorch compilation mode ('default', 'max-autotune', etc.) or None to disable
+            compile_mode: torch.compile mode for the whole MCMC step including the target log density
+                ('default', 'reduce-overhead', 'max-autotune', etc.) or None to disable
             proposal_distribution: ProposalDistribution instance for sampling proposals (new system)
+            external_buffers: Optional BufferPool to use instead of allocating new chain and
+                random number tensors (requires pre_allocate_steps)
+            rng_seed: Seed for the algorithm's own RNG generator (Philox on CUDA), so that
+                the random stream of a run is fixed by this seed alone
+            use_cuda_graph: Capture blocks of steps in a CUDA graph and replay them in
+                generate_samples (CUDA, pre-allocated chain and TorchTargetDistribution only)
+            cuda_graph_block_size: Number of steps captured in one CUDA graph
+            chain_dtype: Storage data type of the pre-allocated chain, e.g. torch.bfloat16 to
+                halve the bandwidth of the per-step chain writes on long runs. The current state,
+                log densities and acceptance decisions stay float32 and ESJD is computed in
+                float32; only the stored samples are rounded. Default: float32
         """
         # Handle backward compatibility and proposal configuration
         if proposal_distribution is not None:
@@ -152,13 +363,17 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         else:
             print("Using CPU (consider installing CUDA for optimal performance)")
         
+        self.beta = beta
         self.beta_tensor = torch.tensor(beta, device=self.device, dtype=torch.float32)
         self.use_efficient_rng = use_efficient_rng
         self.dtype = torch.float32
+        self.chain_dtype = chain_dtype if chain_dtype is not None else self.dtype
         
         # Setup RNG generator for efficiency if on CUDA
         if use_efficient_rng and self.device.type == 'cuda':
             self.rng_generator = torch.Generator(device=self.device)
+            if rng_seed is not None:
+                self.rng_generator.manual_seed(rng_seed)
         else:
             self.rng_generator = None
         
@@ -215,27 +430,34 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         
         self.name = f"RWM_GPU_FUSED_{self.proposal_dist.get_name()}"
         
-        # Performance tracking
+        # Performance tracking (acceptances are counted on the device, see num_acceptances)
         self.num_acceptances = 0
-        self.acceptance_rate = 0.0
         self.total_steps = 0
         self.burn_in = max(0, burn_in)
         
         # Pre-allocate memory
         self.pre_allocate_steps = pre_allocate_steps
+        self.external_buffers = external_buffers if pre_allocate_steps else None
         if pre_allocate_steps:
             # Allocate memory for burn_in + pre_allocate_steps + 1 (initial state)
             total_allocation = self.burn_in + pre_allocate_steps + 1
-            self.pre_allocated_chain = torch.zeros(
-                (total_allocation, dim), 
-                device=self.device, 
-                dtype=self.dtype
-            )
-            self.pre_allocated_log_densities = torch.zeros(
-                total_allocation,
-                device=self.device,
-                dtype=torch.float32  # Keep log densities in float32 for numerical stability
-            )
+            if self.external_buffers is not None:
+                # Rebind to the shared buffers; they are zeroed in generate_samples
+                self.external_buffers.check_compatible(total_allocation, dim, self.device, self.dtype,
+                                                       self.chain_dtype)
+                self.pre_allocated_chain = self.external_buffers.chain[:total_allocation]
+                self.pre_allocated_log_densities = self.external_buffers.log_densities[:total_allocation]
+            else:
+                self.pre_allocated_chain = torch.zeros(
+                    (total_allocation, dim), 
+                    device=self.device, 
+                    dtype=self.chain_dtype
+                )
+                self.pre_allocated_log_densities = torch.zeros(
+                    total_allocation,
+                    device=self.device,
+                    dtype=torch.float32  # Keep log densities in float32 for numerical stability
+                )
             self.chain_index = 0
         else:
             self.pre_allocated_chain = None
@@ -255,6 +477,23 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         
         # Note: Target distribution does not support JIT compilation yet
         self.compiled_log_density = None
+        
+        # Optional CUDA graph replay of blocks of steps in generate_samples
+        self.use_cuda_graph = use_cuda_graph
+        self.cuda_graph_block_size = max(1, cuda_graph_block_size)
+        self._cuda_graph_blocks = {}    # used when there is no BufferPool to share graphs through
+        
+        # Optional torch.compile of the whole step (proposal + log density + acceptance)
+        self.compile_mode = compile_mode
+        self.compiled_step = None
+        if compile_mode is not None:
+            if self.use_torch_target:
+                self.compiled_step = get_compiled_mh_step(compile_mode)
+            else:
+                warnings.warn("compile_mode requires a TorchTargetDistribution - using the uncompiled step")
+        
+        # Fully fused step with the Gaussian log density inlined (uncompiled path only)
+        self.use_mvn_fused_step = isinstance(self.target_dist, MultivariateNormalTorch)
     
     def _setup_target_distribution(self):
         """Setup target distribution evaluation method based on type."""
@@ -268,11 +507,37 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
     def get_name(self):
         return self.name
     
+    @property
+    def num_acceptances(self):
+        """Number of accepted post-burn-in proposals (synchronizes with the device)."""
+        return int(self._num_acceptances)
+    
+    @num_acceptances.setter
+    def num_acceptances(self, value):
+        self._num_acceptances = value
+    
+    @property
+    def acceptance_rate(self):
+        """Post-burn-in acceptance rate (synchronizes with the device)."""
+        return float(self.acceptance_rate_tensor())
+    
+    @acceptance_rate.setter
+    def acceptance_rate(self, value):
+        # Derived from the acceptance counter, so only MHAlgorithm's initial 0 is accepted
+        if value != 0:
+            raise ValueError("acceptance_rate is derived from num_acceptances and cannot be set; "
+                             "set num_acceptances instead")
+    
+    def acceptance_rate_tensor(self):
+        """Post-burn-in acceptance rate as a 0-d device tensor, without synchronizing."""
+        post_burnin_steps = max(1, self.total_steps - self.burn_in)
+        num_acceptances = torch.as_tensor(self._num_acceptances, device=self.device, dtype=torch.float32)
+        return num_acceptances.reshape(()) / post_burnin_steps
+    
     def reset(self):
         """Reset the algorithm to initial state."""
         super().reset()
         self.num_acceptances = 0
-        self.acceptance_rate = 0.0
         self.total_steps = 0
         self.current_state = None
         self.log_target_density_current = None
@@ -298,7 +563,7 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
             # Only add initial state to chain if it hasn't been added yet
             # (this prevents double-adding when called from generate_samples)
             if self.pre_allocated_chain is not None and self.chain_index == 0:
-                self.pre_allocated_chain[self.chain_index] = self.current_state
+                self.pre_allocated_chain[self.chain_index].copy_(self.current_state)
                 self.pre_allocated_log_densities[self.chain_index] = self.log_target_density_current
                 self.chain_index += 1
         
@@ -306,34 +571,64 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         increment = self._get_next_increment()
         random_val = self._get_next_random()
         
-        # Compute proposal and its log density (this is the only non-fused part due to JIT limitations)
-        proposal = self.current_state + increment
-        log_density_proposed = self._compute_log_density_optimized(proposal)
-        
-        # Execute the rest of the MCMC step in a single fused kernel
-        new_state, new_log_density, accepted = ultra_fused_mcmc_step_basic(
-            self.current_state,
-            self.log_target_density_current,
-            increment,
-            random_val,
-            self.beta_tensor,
-            log_density_proposed
-        )
+        if self.compiled_step is not None:
+            if self.device.type == 'cuda':
+                # The previous step's outputs have been consumed, so CUDA graphs may reuse them
+                torch.compiler.cudagraph_mark_step_begin()
+            new_state, new_log_density, accepted = self.compiled_step(
+                self.target_dist.log_density,
+                self.current_state,
+                self.log_target_density_current,
+                increment,
+                random_val,
+                self.beta_tensor
+            )
+        elif self.use_mvn_fused_step:
+            new_state, new_log_density, accepted = mvn_fused_mcmc_step(
+                self.current_state,
+                self.log_target_density_current,
+                increment,
+                random_val,
+                self.beta_tensor,
+                self.target_dist.mean,
+                self.target_dist.cov_inv,
+                self.target_dist.log_norm_const
+            )
+        else:
+            # Compute proposal and its log density (this is the only non-fused part due to JIT limitations)
+            proposal = self.current_state + increment
+            log_density_proposed = self._compute_log_density_optimized(proposal)
+            
+            # Execute the rest of the MCMC step in a single fused kernel
+            new_state, new_log_density, accepted = ultra_fused_mcmc_step_basic(
+                self.current_state,
+                self.log_target_density_current,
+                increment,
+                random_val,
+                self.beta_tensor,
+                log_density_proposed
+            )
         
         self.current_state = new_state
         self.log_target_density_current = new_log_density
         self.total_steps += 1
         
-        # Only count acceptances after burn-in period
+        # Only count acceptances after burn-in period. The count stays on the device so
+        # that steps do not wait for the GPU; acceptance_rate reads it back on demand.
         if self.total_steps > self.burn_in:
-            if accepted.item():
-                self.num_acceptances += 1
-            # Calculate acceptance rate only for post-burn-in samples
-            post_burnin_steps = self.total_steps - self.burn_in
-            if post_burnin_steps > 0:
-                self.acceptance_rate = self.num_acceptances / post_burnin_steps
+            self._num_acceptances = self._num_acceptances + accepted
         
         self._add_to_chain_optimized(self.current_state, self.log_target_density_current)
+        
+        if self.compiled_step is not None:
+            # Compiled outputs may live in CUDA graph memory that the next step overwrites,
+            # so continue from the copy stored in the chain (or a clone of the outputs)
+            if self.pre_allocated_chain is not None and self.chain_dtype == self.dtype:
+                self.current_state = self.pre_allocated_chain[self.chain_index - 1]
+                self.log_target_density_current = self.pre_allocated_log_densities[self.chain_index - 1]
+            else:
+                self.current_state = self.current_state.clone()
+                self.log_target_density_current = self.log_target_density_current.clone()
     
     def _get_next_increment(self):
         """Get the next pre-computed increment efficiently."""
@@ -375,7 +670,7 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         """Add state to chain with optimal memory usage."""
         if self.pre_allocated_chain is not None:
             if self.chain_index < self.pre_allocated_chain.shape[0]:
-                self.pre_allocated_chain[self.chain_index] = state
+                self.pre_allocated_chain[self.chain_index].copy_(state)
                 self.pre_allocated_log_densities[self.chain_index] = log_density
                 self.chain_index += 1
             else:
@@ -399,7 +694,7 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         else:
             return None
     
-    def generate_samples(self, num_samples: int):
+    def generate_samples(self, num_samples: int, synchronize: bool = True):
         """Generate samples with ultra-optimization.
         
         Note: Random Walk Metropolis steps MUST be processed sequentially due to 
@@ -413,6 +708,9 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         
         Args:
             num_samples: Total number of samples to generate (AFTER burn-in)
+            synchronize: Wait for the GPU at the end and report kernel timing. Pass False to
+                only enqueue the work on the current CUDA stream, e.g. to overlap independent
+                runs on several streams; the returned chain is then still being written.
             
         Returns:
             Chain of samples as a torch tensor (EXCLUDING burn-in samples)
@@ -420,6 +718,11 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         print(f"Generating {num_samples} samples (+ {self.burn_in} burn-in) using GPU RWM")
         print("Note: Steps processed sequentially (required for RWM dependency chain)")
         
+        # Shared buffers still hold the previous run's chain
+        if self.external_buffers is not None and self.pre_allocated_chain is not None and self.chain_index == 0:
+            self.pre_allocated_chain.zero_()
+            self.pre_allocated_log_densities.zero_()
+        
         # Pre-compute ALL random numbers for maximum efficiency
         # Total steps = burn_in + num_samples
         total_steps = self.burn_in + num_samples
@@ -430,20 +733,22 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         # Initialize if needed
         if self.current_state is None:
             print(f"Initial state: {self.chain[-1]}")
-            print(f"Target density at the initial state: {torch.exp(self.target_dist.log_density(torch.tensor(self.chain[-1], device=self.device, dtype=self.dtype)))}")
+            if synchronize:
+                print(f"Target density at the initial state: {torch.exp(self.target_dist.log_density(torch.tensor(self.chain[-1], device=self.device, dtype=self.dtype)))}")
             self.current_state = torch.tensor(
                 self.chain[-1], device=self.device, dtype=self.dtype
             )
             self.log_target_density_current = self._compute_log_density_optimized(self.current_state)
             
             if self.pre_allocated_chain is not None and self.chain_index == 0:
-                self.pre_allocated_chain[self.chain_index] = self.current_state
+                self.pre_allocated_chain[self.chain_index].copy_(self.current_state)
                 self.pre_allocated_log_densities[self.chain_index] = self.log_target_density_current
                 self.chain_index += 1
                 initial_state_added = True
         
         # Use CUDA events for precise timing
-        if self.device.type == 'cuda':
+        timed = synchronize and self.device.type == 'cuda'
+        if timed:
             torch.cuda.synchronize()
             start_event = torch.cuda.Event(enable_timing=True)
             end_event = torch.cuda.Event(enable_timing=True)
@@ -451,22 +756,29 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
         
         start_time = time.time()
         
+        # Whole blocks of steps can be replayed from a CUDA graph; the rest run one by one
+        graph_steps = 0
+        if self._can_use_cuda_graph(total_steps):
+            graph_steps = self._generate_with_cuda_graph(total_steps)
+        
         # Process steps sequentially (REQUIRED for RWM)
         # Generate burn_in + num_samples total steps
-        for i in range(total_steps):
+        for i in range(graph_steps, total_steps):
             self.step()  # Each step depends on the previous state
             
             if (i + 1) % 1000 == 0:
                 elapsed = time.time() - start_time
                 rate = (i + 1) / elapsed
-                if self.total_steps > self.burn_in:
+                if self.total_steps > self.burn_in and synchronize:
                     print(f"Generated {i + 1}/{total_steps} samples "
                           f"(Rate: {rate:.1f} samples/sec, Accept: {self.acceptance_rate:.3f})")
+                elif self.total_steps > self.burn_in:
+                    print(f"Generated {i + 1}/{total_steps} samples (Rate: {rate:.1f} samples/sec)")
                 else:
                     print(f"Burn-in: {i + 1}/{self.burn_in} samples "
                           f"(Rate: {rate:.1f} samples/sec)")
         
-        if self.device.type == 'cuda':
+        if timed:
             end_event.record()
             torch.cuda.synchronize()
             gpu_time = start_event.elapsed_time(end_event) / 1000.0  # Convert to seconds
@@ -487,20 +799,95 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
             
         return full_chain[burn_in_offset:]
     
+    def _can_use_cuda_graph(self, total_steps):
+        """Return whether the next total_steps steps can be replayed from a CUDA graph."""
+        return (self.use_cuda_graph and
+                self.device.type == 'cuda' and
+                self.use_torch_target and
+                self.compiled_step is None and  # reduce-overhead compilation uses CUDA graphs itself
+                self.pre_allocated_chain is not None and
+                self.chain_index + total_steps <= self.pre_allocated_chain.shape[0] and
+                self.precomputed_increments is not None and
+                self.increment_index + total_steps <= self.precomputed_increments.shape[0])
+    
+    def _generate_with_cuda_graph(self, total_steps):
+        """Run as many whole blocks of steps as fit in total_steps by replaying a CUDA graph.
+        
+        One block of cuda_graph_block_size steps is captured once and replayed, so the kernels
+        of a block are launched with a single call. The graph reads its increments and uniforms
+        from small staging buffers that are refilled from the pre-computed random numbers before
+        every replay, and writes its states to a staging block that is copied into the chain
+        afterwards. The draws, and hence the chain, are the same as without the graph.
+        
+        The captured block is cached on the BufferPool if there is one (see get_cuda_graph_block),
+        so later runs sharing the pool, such as the configurations of a sweep, only replay it.
+        
+        The target log density must be capturable (no host synchronization). If capture fails,
+        a warning is issued and no steps are run.
+        
+        Returns:
+            Number of steps that were run
+        """
+        block_size = self.cuda_graph_block_size
+        num_blocks = total_steps // block_size
+        if num_blocks == 0:
+            return 0
+        
+        try:
+            cache = self.external_buffers.cuda_graph_blocks if self.external_buffers is not None else self._cuda_graph_blocks
+            graph_block = get_cuda_graph_block(
+                cache, self.target_dist, self.dim, block_size, self.device, self.dtype, float(self.beta),
+                self.current_state, self.log_target_density_current
+            )
+        except RuntimeError as e:
+            warnings.warn(f"CUDA graph capture failed ({e}) - running steps without the graph")
+            return 0
+        
+        graph_block.state.copy_(self.current_state)
+        graph_block.log_density.copy_(self.log_target_density_current.reshape(()))
+        for block in range(num_blocks):
+            start = self.increment_index
+            graph_block.increment_block.copy_(self.precomputed_increments[start:start + block_size])
+            graph_block.random_block.copy_(self.precomputed_random_vals[start:start + block_size])
+            graph_block.graph.replay()
+            
+            self.pre_allocated_chain[self.chain_index:self.chain_index + block_size].copy_(graph_block.state_block)
+            self.pre_allocated_log_densities[self.chain_index:self.chain_index + block_size].copy_(graph_block.log_density_block)
+            self.chain_index += block_size
+            
+            # Only count acceptances after burn-in period
+            first_counted = max(0, self.burn_in - self.total_steps)
+            if first_counted < block_size:
+                self._num_acceptances = self._num_acceptances + graph_block.accept_block[first_counted:].sum()
+            self.total_steps += block_size
+            self.increment_index += block_size
+        
+        # The static tensors are reused by the next run, so keep copies
+        self.current_state = graph_block.state.clone()
+        self.log_target_density_current = graph_block.log_density.clone()
+        return num_blocks * block_size
+    
     def _precompute_all_randoms(self, total_steps):
         """Pre-compute all random numbers for optimal GPU memory usage."""
         print(f"Pre-computing {total_steps} random increments using {self.proposal_dist.get_name()}...")
         
-        # Use proposal distribution for efficient batch generation
-        self.precomputed_increments = self.proposal_dist.sample(total_steps)
-        
-        # Pre-compute random values for acceptance decisions (Uniform[0,1])
-        if self.rng_generator is not None:
-            self.precomputed_random_vals = torch.rand(total_steps, device=self.device, 
-                                                    dtype=torch.float32, generator=self.rng_generator)
+        if self.external_buffers is not None and self.external_buffers.increments.shape[0] >= total_steps:
+            # Sample directly into the shared buffers instead of allocating new tensors
+            self.precomputed_increments = self.external_buffers.increments[:total_steps]
+            self.proposal_dist.sample_into(total_steps, self.precomputed_increments)
+            self.precomputed_random_vals = self.external_buffers.random_vals[:total_steps]
+            self.precomputed_random_vals.uniform_(generator=self.rng_generator)
         else:
-            self.precomputed_random_vals = torch.rand(total_steps, device=self.device, 
-                                                    dtype=torch.float32)
+            # Use proposal distribution for efficient batch generation
+            self.precomputed_increments = self.proposal_dist.sample(total_steps)
+            
+            # Pre-compute random values for acceptance decisions (Uniform[0,1])
+            if self.rng_generator is not None:
+                self.precomputed_random_vals = torch.rand(total_steps, device=self.device, 
+                                                        dtype=torch.float32, generator=self.rng_generator)
+            else:
+                self.precomputed_random_vals = torch.rand(total_steps, device=self.device, 
+                                                        dtype=torch.float32)
         
         self.increment_index = 0
         
@@ -512,6 +899,10 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
     
     def expected_squared_jump_distance_gpu(self):
         """Compute ESJD using optimized GPU operations."""
+        return self.expected_squared_jump_distance_tensor().item()
+    
+    def expected_squared_jump_distance_tensor(self):
+        """Compute ESJD as a 0-d device tensor, without synchronizing."""
         if self.pre_allocated_chain is not None and self.chain_index > 1:
             if self.chain_index > self.burn_in + 1:  # Need at least 2 post-burn-in samples
                 chain_tensor = self.pre_allocated_chain[self.burn_in:self.chain_index]
@@ -525,22 +916,25 @@ class RandomWalkMH_GPU_Optimized(MHAlgorithm):
                 raise ValueError(f"Insufficient post-burn-in samples: total_samples={chain_tensor.shape[0]}, burn_in={self.burn_in}. Need at least {self.burn_in + 2} total samples.")
         
         if chain_tensor.shape[0] < 2:
-            return 0.0
+            return torch.zeros((), device=chain_tensor.device)
             
-        # Optimized difference computation
+        # Optimized difference computation (in float32 if the chain is stored in lower precision)
+        chain_tensor = chain_tensor.to(torch.float32)
         diff = chain_tensor[1:] - chain_tensor[:-1]
         squared_jumps = torch.sum(diff * diff, dim=1)  # More efficient than diff**2
         
-        return torch.mean(squared_jumps).item()
+        return torch.mean(squared_jumps)
     
     def get_diagnostic_info(self):
         """Get detailed diagnostic information about the GPU optimization."""
         info = {
             'device': str(self.device),
             'dtype': str(self.dtype),
+            'chain_dtype': str(self.chain_dtype),
             'optimization_level': 'ULTRA_FUSED',
             'use_efficient_rng': self.use_efficient_rng,
             'compiled_target': self.compiled_log_density is not None,
+            'mvn_fused_step': self.use_mvn_fused_step,
             'total_steps': self.total_steps,
             'acceptance_rate': self.acceptance_rate,
             'kernel_fusion': 'Single kernel for entire MCMC step',
@@ -9,6 +9,16 @@ import matplotlib.pyplot as plt
 import json
 import tqdm
 import os
+import contextlib
+import functools
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Number of CUDA streams used to overlap independent sweep configurations
+NUM_SWEEP_STREAMS = 3
 
 def calculate_hybrid_rosenbrock_dim(n1, n2):
     """Calculate the dimension for HybridRosenbrock: 1 + n2 * (n1 - 1)"""
@@ -18,6 +28,45 @@ def calculate_super_funnel_dim(J, K):
     """Calculate the dimension for SuperFunnel: J + J*K + 1 + K + 1 + 1"""
     return J + J * K + 1 + K + 1 + 1
 
+def can_retain_chain(chain, device):
+    """Return whether a copy of a chain tensor can stay on the device without risking OOM.
+    
+    The copy stays allocated for the rest of the sweep, so require free memory for
+    roughly twice the chain size to leave headroom for the remaining simulations.
+    """
+    if device.type != 'cuda':
+        return True
+    free_bytes, _ = torch.cuda.mem_get_info(device)
+    return free_bytes > 2 * chain.numel() * chain.element_size()
+
+def save_results(data, filename):
+    """Write a results dict to JSON indented by 2 spaces. numpy arrays and scalars are serialized directly.
+    
+    Uses orjson when it is installed, which serializes numpy arrays without converting
+    every element to a Python float first, and falls back to the standard json module.
+    """
+    if orjson is not None:
+        with open(filename, "wb") as file:
+            file.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(filename, "w") as file:
+            json.dump(data, file, indent=2, default=lambda value: value.tolist())
+
+@functools.lru_cache(maxsize=4)
+def _make_superfunnel_data(J, K, n_per_group, device_str):
+    """Generate (and cache) the synthetic logistic regression data for SuperFunnel.
+    
+    A separate fixed-seed generator keeps the data reproducible without resetting the
+    global RNG used by the MCMC run. Returns the design matrices of all groups as one
+    (J, n_per_group, K) tensor and the binary outcomes as a (J, n_per_group) tensor;
+    callers must not modify them in place.
+    """
+    data_generator = torch.Generator(device=device_str).manual_seed(42)
+    X_data = torch.randn((J, n_per_group, K), device=device_str, generator=data_generator)
+    # Synthetic binary outcomes from a simple logistic model: logit(p) = 0.5 * sum(X_j, dim=1)
+    Y_data = torch.bernoulli(torch.sigmoid(0.5 * X_data.sum(dim=-1)), generator=data_generator)
+    return X_data, Y_data
+
 def get_target_distribution(name, dim, use_torch=True, device=None, **kwargs):
     """Get target distribution with optional GPU acceleration."""
     
@@ -100,20 +149,8 @@ def get_target_distribution(name, dim, use_torch=True, device=None, **kwargs):
             prior_hypermean_std = kwargs.get('prior_hypermean_std', 10.0)
             prior_tau_scale = kwargs.get('prior_tau_scale', 2.5)
             
-            # Generate synthetic data for SuperFunnel on the correct device
-            torch.manual_seed(42)  # For reproducible synthetic data
-            X_data = []
-            Y_data = []
-            for j in range(J):
-                # Generate random design matrix for group j
-                X_j = torch.randn(n_per_group, K, device=device)
-                # Generate synthetic binary outcomes
-                # Use simple logistic model: logit(p) = 0.5 * sum(X_j, dim=1)
-                logits = 0.5 * torch.sum(X_j, dim=1)
-                probs = torch.sigmoid(logits)
-                Y_j = torch.bernoulli(probs)
-                X_data.append(X_j)
-                Y_data.append(Y_j)
+            # Synthetic data for SuperFunnel on the correct device (generated once per setup)
+            X_data, Y_data = _make_superfunnel_data(J, K, n_per_group, str(device))
             
             return SuperFunnelTorch(J, K, X_data, Y_data, 
                                   prior_hypermean_std=prior_hypermean_std, 
@@ -163,8 +200,18 @@ def get_target_distribution(name, dim, use_torch=True, device=None, **kwargs):
             raise ValueError("Unknown target distribution name")
 
 def run_study(dim, target_name="MultivariateNormalTorch", num_iters=100000, var_max=3.5, 
-              seed=42, burn_in=1000, proposal_name="Normal", proposal_params=None, **kwargs):
-    """Run many simulations with different scale parameter values for different proposal distributions."""
+              seed=42, burn_in=1000, proposal_name="Normal", proposal_params=None, batched=False,
+              compile_mode=None, use_cuda_graph=False, chain_dtype=None, **kwargs):
+    """Run many simulations with different scale parameter values for different proposal distributions.
+    
+    With batched=True (Normal proposal only), all scale parameter values run as independent
+    chains of a single batched simulation instead of one simulation per value.
+    compile_mode is passed to RandomWalkMH_GPU_Optimized to torch.compile its MCMC step; the
+    compiled step is shared by all configurations. use_cuda_graph replays blocks of MCMC
+    steps from a CUDA graph instead of launching every step's kernels from Python.
+    chain_dtype (e.g. torch.bfloat16) sets the storage dtype of the chains; sampling and
+    metrics stay in float32.
+    """
     
     # Set device explicitly
     if torch.cuda.is_available():
@@ -199,76 +246,200 @@ def run_study(dim, target_name="MultivariateNormalTorch", num_iters=100000, var_
         print(f"{'='*60}")
     
     target_distribution = get_target_distribution(target_name, dim, use_torch=True, device=device, **kwargs)
+    # The scale parameters are saved and printed in float64; a float32 copy of the variance
+    # schedule stays on the device
     scale_param_range = np.linspace(0.01, var_max, 40)
+    scale_range_gpu = torch.as_tensor(scale_param_range, dtype=torch.float32, device=device)
+    variances_gpu = scale_range_gpu.square() / actual_dim
+    
+    # Anisotropic Laplace variance profile, moved to the device once for all configurations
+    anisotropic_gpu = None
+    if proposal_params and 'anisotropic' in proposal_params:
+        anisotropic_gpu = torch.as_tensor(proposal_params['anisotropic'], dtype=torch.float32, device=device)
     
     acceptance_rates = []
     expected_squared_jump_distances = []
     times = []
     
+    # Keep the chain of the best configuration seen so far so that the traceplot
+    # does not need a second simulation at the optimal scale parameter
+    best_chain_gpu = None
+    
+    if batched and proposal_name != "Normal":
+        raise ValueError(f"Batched sweeps only support the Normal proposal, got {proposal_name}")
+    
+    # Independent configurations are overlapped on a small pool of CUDA streams, enqueued
+    # round-robin. Each stream owns one buffer pool shared by all of its configurations,
+    # so a configuration only has to wait for the one NUM_SWEEP_STREAMS places before it.
+    if batched:
+        streams = []
+        buffer_pools = []
+    else:
+        streams = [torch.cuda.Stream(device=device) for _ in range(NUM_SWEEP_STREAMS)] if device.type == 'cuda' else [None]
+        buffer_pools = [BufferPool(num_iters, actual_dim, burn_in=burn_in, device=device, chain_dtype=chain_dtype)
+                        for _ in streams]
+        # The best chain is selected on the device: comparing ESJDs on the host would wait
+        # for every configuration to finish before the next one could be enqueued. It is
+        # allocated before the side streams are synchronized so that they see it initialized.
+        total_allocation = burn_in + num_iters + 1
+        if can_retain_chain(buffer_pools[0].chain[:total_allocation], device):
+            best_chain_gpu = torch.zeros_like(buffer_pools[0].chain[:total_allocation])
+            best_esjd_gpu = torch.full((), -np.inf, device=device)
+        for stream in streams:
+            if stream is not None:
+                # Side streams must see the target distribution and buffers set up so far
+                stream.wait_stream(torch.cuda.current_stream(device))
+    
     print(f"\nRunning simulations with {len(scale_param_range)} {proposal_name} proposal scale values...")
     
     total_start = time.time()
     
-    # Use tqdm for progress bar
-    for i, scale_param in enumerate(tqdm.tqdm(scale_param_range, desc=f"Running RWM with {proposal_name} scale =", unit="config")):
-        
-        # Create proposal configuration based on proposal type and scale parameter
-        if proposal_name == "Normal":
-            # For Normal: scale_param^2 / dim gives variance (consistent with original experiment)
-            proposal_variance = (scale_param ** 2) / (actual_dim ** 1)
-            proposal_config = {
-                'name': 'Normal',
-                'params': {'base_variance_scalar': proposal_variance}
-            }
-        elif proposal_name == "Laplace":
-            # For Laplace: use similar scaling but interpret as variance 
-            effective_variance = (scale_param ** 2) / (actual_dim ** 1)
-            if proposal_params and 'anisotropic' in proposal_params:
-                # Use provided variance vector
-                base_variance_vector = torch.tensor(proposal_params['anisotropic'], dtype=torch.float32) * effective_variance
-            else:
-                # Isotropic case
-                base_variance_vector = effective_variance
-            proposal_config = {
-                'name': 'Laplace', 
-                'params': {'base_variance_vector': base_variance_vector}
-            }
-        elif proposal_name == "UniformRadius":
-            # For Uniform: scale_param directly as radius parameter
-            proposal_config = {
-                'name': 'UniformRadius',
-                'params': {'base_radius': scale_param}
-            }
-        else:
-            raise ValueError(f"Unknown proposal name: {proposal_name}")
-        
-        iteration_start = time.time()
-        
-        simulation = MCMCSimulation_GPU(
-            dim=actual_dim,
-            proposal_config=proposal_config,
-            num_iterations=num_iters,
-            algorithm=RandomWalkMH_GPU_Optimized,
-            target_dist=target_distribution,
+    if batched:
+        # All configurations run as independent chains of a single batched simulation
+        torch.manual_seed(seed)
+        np.random.seed(seed)
+        batched_algorithm = RandomWalkMH_GPU_Batched(
+            actual_dim,
+            variances_gpu,
+            target_distribution,
             symmetric=True,
-            pre_allocate=True,
-            seed=seed,
             burn_in=burn_in,
-            device=device
+            device=device,
+            pre_allocate_steps=num_iters,
+            rng_seed=seed,
+            chain_dtype=chain_dtype
         )
+        batched_algorithm.generate_samples(num_iters)
         
-        chain = simulation.generate_samples(progress_bar=False)
+        metrics_gpu = torch.stack([batched_algorithm.acceptance_rates_gpu(),
+                                   batched_algorithm.expected_squared_jump_distances_gpu()])
+        # Configurations share every step, so report the average time per configuration
+        times = [(time.time() - total_start) / len(scale_param_range)] * len(scale_param_range)
+    else:
+        best_update_done = None
+        
+        acceptance_rates_gpu = []
+        expected_squared_jump_distances_gpu = []
+        start_events = []
+        end_events = []
+        
+        # Use tqdm for progress bar
+        for i, scale_param in enumerate(tqdm.tqdm(scale_param_range, desc=f"Running RWM with {proposal_name} scale =", unit="config")):
+            stream = streams[i % len(streams)]
+            buffer_pool = buffer_pools[i % len(streams)]
+        
+            # Device-side proposal parameters (the anisotropic Laplace variance vector) are
+            # computed on the configuration's stream, which owns them for the allocator
+            with torch.cuda.stream(stream) if stream is not None else contextlib.nullcontext():
+                # Create proposal configuration based on proposal type and scale parameter
+                if proposal_name == "Normal":
+                    # For Normal: scale_param^2 / dim gives variance (consistent with original experiment),
+                    # passed as a 0-d device tensor
+                    proposal_variance = variances_gpu[i]
+                    proposal_config = {
+                        'name': 'Normal',
+                        'params': {'base_variance_scalar': proposal_variance}
+                    }
+                elif proposal_name == "Laplace":
+                    # For Laplace: use similar scaling but interpret as variance 
+                    if anisotropic_gpu is not None:
+                        # Use provided variance vector, scaled on the device
+                        base_variance_vector = anisotropic_gpu * variances_gpu[i]
+                    else:
+                        # Isotropic case
+                        base_variance_vector = (scale_param ** 2) / (actual_dim ** 1)
+                    proposal_config = {
+                        'name': 'Laplace', 
+                        'params': {'base_variance_vector': base_variance_vector}
+                    }
+                elif proposal_name == "UniformRadius":
+                    # For Uniform: scale_param directly as radius parameter
+                    proposal_config = {
+                        'name': 'UniformRadius',
+                        'params': {'base_radius': scale_param}
+                    }
+                else:
+                    raise ValueError(f"Unknown proposal name: {proposal_name}")
         
-        iteration_time = time.time() - iteration_start
-        times.append(iteration_time)
+                if stream is not None:
+                    start_events.append(torch.cuda.Event(enable_timing=True))
+                    start_events[-1].record(stream)
+                iteration_start = time.time()
+            
+                simulation = MCMCSimulation_GPU(
+                    dim=actual_dim,
+                    proposal_config=proposal_config,
+                    num_iterations=num_iters,
+                    algorithm=RandomWalkMH_GPU_Optimized,
+                    target_dist=target_distribution,
+                    symmetric=True,
+                    pre_allocate=True,
+                    seed=seed,
+                    burn_in=burn_in,
+                    device=device,
+                    external_buffers=buffer_pool,
+                    compile_mode=compile_mode,
+                    use_cuda_graph=use_cuda_graph,
+                    chain_dtype=chain_dtype,
+                    # Independent, reproducible random stream per (seed, configuration)
+                    rng_seed=seed * len(scale_param_range) + i
+                )
+            
+                chain = simulation.generate_samples(progress_bar=False, synchronize=False)
+                
+                # Keep the metrics on the device; they are read back once after the sweep
+                acceptance_rates_gpu.append(simulation.acceptance_rate_tensor())
+                esjd_gpu = simulation.expected_squared_jump_distance_tensor()
+                expected_squared_jump_distances_gpu.append(esjd_gpu)
+            
+                if best_chain_gpu is not None:
+                    # The chain lives in the stream's buffer pool and is overwritten by a later
+                    # configuration, so copy it out if it is the best so far. The shared best
+                    # chain is updated by all streams, so updates are ordered with events.
+                    if best_update_done is not None:
+                        stream.wait_event(best_update_done)
+                    is_better = esjd_gpu > best_esjd_gpu
+                    chain_gpu = simulation.algorithm.get_chain_gpu()
+                    # Written in place: a chain-sized temporary per configuration would double
+                    # the memory the sweep needs on top of the buffer pools
+                    torch.where(is_better, chain_gpu, best_chain_gpu, out=best_chain_gpu)
+                    torch.maximum(esjd_gpu, best_esjd_gpu, out=best_esjd_gpu)
+                    if stream is not None:
+                        best_update_done = torch.cuda.Event()
+                        best_update_done.record(stream)
+                
+                if stream is not None:
+                    end_events.append(torch.cuda.Event(enable_timing=True))
+                    end_events[-1].record(stream)
+                else:
+                    times.append(time.time() - iteration_start)
         
-        acceptance_rates.append(simulation.acceptance_rate())
-        expected_squared_jump_distances.append(simulation.expected_squared_jump_distance())
+        # Wait for all streams before reading the event timings
+        if device.type == 'cuda':
+            torch.cuda.synchronize(device)
+            times = [start.elapsed_time(end) / 1000.0 for start, end in zip(start_events, end_events)]
+        metrics_gpu = torch.stack([torch.stack(acceptance_rates_gpu), torch.stack(expected_squared_jump_distances_gpu)])
+        # The sweep is over, so release the CUDA graphs captured on the buffer pools
+        for buffer_pool in buffer_pools:
+            buffer_pool.cuda_graph_blocks.clear()
+    
+    # Select the optimal configuration on the device, then move the metrics and the selected
+    # index to the host together in a single float64 transfer. float64 holds every index exactly
+    # (up to 2**53) whatever the dtype of the metrics, and widening the metrics is lossless.
+    num_configs = len(scale_param_range)
+    max_esjd_index_gpu = metrics_gpu[1].argmax()
+    metrics = torch.cat([metrics_gpu.flatten().double(), max_esjd_index_gpu.double().reshape(1)]).cpu().numpy()
+    # Lists of Python floats, as returned before the metrics were kept on the device
+    acceptance_rates = metrics[:num_configs].tolist()
+    expected_squared_jump_distances = metrics[num_configs:2 * num_configs].tolist()
+    max_esjd_index = int(metrics[-1])
+    
+    if batched:
+        best_chain_gpu = batched_algorithm.get_chain_gpu(max_esjd_index)
     
     total_time = time.time() - total_start
     
-    max_esjd = max(expected_squared_jump_distances)
-    max_esjd_index = np.argmax(expected_squared_jump_distances)
+    max_esjd = expected_squared_jump_distances[max_esjd_index]
     max_acceptance_rate = acceptance_rates[max_esjd_index]
     max_scale_param = scale_param_range[max_esjd_index]
     
@@ -297,72 +468,80 @@ def run_study(dim, target_name="MultivariateNormalTorch", num_iters=100000, var_
     }
     
     filename = f"data/{target_name}_{proposal_name}_RWM_GPU_dim{actual_dim}_{num_iters}iters_seed{seed}.json"
-    with open(filename, "w") as file:
-        json.dump(data, file, indent=2)
+    save_results(data, filename)
     print(f"   Results saved to: {filename}")
     
     # Create traceplot using optimal scale parameter
     print(f"\nGenerating traceplot with optimal {proposal_name} scale parameter ({max_scale_param:.6f})...")
     
-    # Recreate optimal proposal config
-    if proposal_name == "Normal":
-        optimal_proposal_variance = (max_scale_param ** 2) / (actual_dim ** 1)
-        optimal_proposal_config = {
-            'name': 'Normal',
-            'params': {'base_variance_scalar': optimal_proposal_variance}
-        }
-    elif proposal_name == "Laplace":
-        optimal_effective_variance = (max_scale_param ** 2) / (actual_dim ** 1)
-        if proposal_params and 'anisotropic' in proposal_params:
-            optimal_base_variance_vector = torch.tensor(proposal_params['anisotropic'], dtype=torch.float32) * optimal_effective_variance
-        else:
-            optimal_base_variance_vector = optimal_effective_variance
-        optimal_proposal_config = {
-            'name': 'Laplace', 
-            'params': {'base_variance_vector': optimal_base_variance_vector}
-        }
-    elif proposal_name == "UniformRadius":
-        optimal_proposal_config = {
-            'name': 'UniformRadius',
-            'params': {'base_radius': max_scale_param}
-        }
-    
-    # Run one more simulation with optimal scale parameter to get chain for traceplot
-    traceplot_simulation = MCMCSimulation_GPU(
-        dim=actual_dim,
-        proposal_config=optimal_proposal_config,
-        num_iterations=num_iters,
-        algorithm=RandomWalkMH_GPU_Optimized,
-        target_dist=target_distribution,
-        symmetric=True,
-        pre_allocate=True,
-        seed=seed,
-        burn_in=burn_in,
-        device=device
-    )
-    
-    traceplot_chain = traceplot_simulation.generate_samples(progress_bar=False)
+    if best_chain_gpu is None:
+        # The optimal chain could not be kept on the device during the sweep,
+        # so rerun the simulation at the optimal scale parameter
+        if proposal_name == "Normal":
+            optimal_proposal_variance = (max_scale_param ** 2) / (actual_dim ** 1)
+            optimal_proposal_config = {
+                'name': 'Normal',
+                'params': {'base_variance_scalar': optimal_proposal_variance}
+            }
+        elif proposal_name == "Laplace":
+            optimal_effective_variance = (max_scale_param ** 2) / (actual_dim ** 1)
+            if anisotropic_gpu is not None:
+                optimal_base_variance_vector = anisotropic_gpu * optimal_effective_variance
+            else:
+                optimal_base_variance_vector = optimal_effective_variance
+            optimal_proposal_config = {
+                'name': 'Laplace', 
+                'params': {'base_variance_vector': optimal_base_variance_vector}
+            }
+        elif proposal_name == "UniformRadius":
+            optimal_proposal_config = {
+                'name': 'UniformRadius',
+                'params': {'base_radius': max_scale_param}
+            }
+    
+        # Run one more simulation with optimal scale parameter to get chain for traceplot
+        traceplot_simulation = MCMCSimulation_GPU(
+            dim=actual_dim,
+            proposal_config=optimal_proposal_config,
+            num_iterations=num_iters,
+            algorithm=RandomWalkMH_GPU_Optimized,
+            target_dist=target_distribution,
+            symmetric=True,
+            pre_allocate=True,
+            seed=seed,
+            burn_in=burn_in,
+            device=device,
+            external_buffers=buffer_pools[0] if buffer_pools else None,
+            compile_mode=compile_mode,
+            use_cuda_graph=use_cuda_graph,
+            chain_dtype=chain_dtype,
+            rng_seed=seed * len(scale_param_range) + max_esjd_index
+        )
+    
+        traceplot_chain = traceplot_simulation.generate_samples(progress_bar=False)
+        best_chain_gpu = traceplot_simulation.algorithm.get_chain_gpu()
     
     # Create traceplot figure
     plt.figure(figsize=(12, 8))
     
-    # Get chain data - use GPU tensor if available for efficiency
-    if hasattr(traceplot_simulation.algorithm, 'get_chain_gpu'):
-        chain_data = traceplot_simulation.algorithm.get_chain_gpu().cpu().numpy()
-    else:
-        chain_data = np.array(traceplot_simulation.algorithm.chain)
-    
-    # Apply burn-in (skip first 1000 samples for visualization)
+    # Apply burn-in (skip first 1000 samples for visualization) on the device
     burn_in_samples = burn_in  # Use 10% or 1000, whichever is smaller
-    if len(chain_data) > burn_in_samples:
-        chain_data = chain_data[burn_in_samples:]
+    chain_post_gpu = best_chain_gpu
+    if len(chain_post_gpu) > burn_in_samples:
+        chain_post_gpu = chain_post_gpu[burn_in_samples:]
+    
+    # Only the plotted points are copied to the host: the traceplot is thinned to at
+    # most ~2000 points per dimension
+    trace_stride = max(1, len(chain_post_gpu) // 2000)
+    chain_data = chain_post_gpu[::trace_stride].float().cpu().numpy()
+    trace_iterations = np.arange(len(chain_data)) * trace_stride
     
     # Determine number of dimensions to plot (max 3)
     num_dims_to_plot = min(3, actual_dim)
     
     if num_dims_to_plot == 1:
         # Single dimension plot
-        plt.plot(chain_data[:, 0], alpha=0.7, linewidth=0.5, color='blue')
+        plt.plot(trace_iterations, chain_data[:, 0], alpha=0.7, linewidth=0.5, color='blue')
         plt.xlabel('Iteration')
         plt.ylabel('Value')
         plt.title(f'Traceplot - {target_name} (Dimension 1)\nOptimal scale parameter: {max_scale_param:.6f}, Acceptance rate: {max_acceptance_rate:.3f}')
@@ -371,7 +550,7 @@ def run_study(dim, target_name="MultivariateNormalTorch", num_iters=100000, var_
         # Multiple dimensions subplot
         for i in range(num_dims_to_plot):
             plt.subplot(num_dims_to_plot, 1, i + 1)
-            plt.plot(chain_data[:, i], alpha=0.7, linewidth=0.5, color=f'C{i}')
+            plt.plot(trace_iterations, chain_data[:, i], alpha=0.7, linewidth=0.5, color=f'C{i}')
             plt.ylabel(f'Dimension {i + 1}')
             plt.grid(True, alpha=0.3)
             
@@ -398,13 +577,11 @@ def run_study(dim, target_name="MultivariateNormalTorch", num_iters=100000, var_
         
         plt.figure(figsize=(10, 8))
         
-        # Extract first two dimensions of the chain
-        x_chain = chain_data[:, 0]
-        y_chain = chain_data[:, 1]
-        
-        # Determine plot bounds based on chain data with very minimal padding
-        x_min, x_max = np.min(x_chain), np.max(x_chain)
-        y_min, y_max = np.min(y_chain), np.max(y_chain)
+        # Determine plot bounds based on the full post-burn-in chain with very minimal
+        # padding. torch.aminmax reduces both coordinates in a single pass on the device,
+        # and the four bounds come back to the host in one transfer.
+        xy_min, xy_max = torch.aminmax(chain_post_gpu[:, :2], dim=0)
+        (x_min, y_min), (x_max, y_max) = torch.stack([xy_min, xy_max]).float().cpu().numpy()
         x_range = x_max - x_min
         y_range = y_max - y_min
         padding = 0.02  # 2% padding
@@ -419,47 +596,49 @@ def run_study(dim, target_name="MultivariateNormalTorch", num_iters=100000, var_
         y_grid = np.linspace(y_plot_min, y_plot_max, 100)
         X, Y = np.meshgrid(x_grid, y_grid)
         
-        # Evaluate target density on the grid
-        Z = np.zeros_like(X)
-        for i in range(X.shape[0]):
-            for j in range(X.shape[1]):
-                # Create a point with the first two dimensions from the grid
-                # and remaining dimensions set to zero (or mean values)
-                point = np.zeros(actual_dim)
-                point[0] = X[i, j]
-                point[1] = Y[i, j]
-                
-                # For higher dimensions, use the mean of the chain for other dimensions
-                if actual_dim > 2:
-                    point[2:] = np.mean(chain_data[:, 2:], axis=0)
+        # Evaluate target density on the whole grid in a single batched call.
+        # Dimensions 0/1 come from the grid; for higher dimensions, the remaining
+        # coordinates are fixed at the mean of the chain.
+        is_torch_target = hasattr(target_distribution, 'device') or isinstance(target_distribution, torch.nn.Module)
+        chain_mean_gpu = chain_post_gpu[:, 2:].float().mean(dim=0) if actual_dim > 2 else None
+        try:
+            if is_torch_target:
+                grid_device = getattr(target_distribution, 'device', device)
+                # Match the dtype of the target's parameters to avoid implicit casts
+                # (the torch targets keep their constants in float32)
+                grid_dtype = torch.float32
+                if isinstance(target_distribution, torch.nn.Module):
+                    first_param = next(target_distribution.parameters(), None)
+                    if first_param is not None:
+                        grid_dtype = first_param.dtype
                 
-                # Evaluate density - handle both PyTorch and numpy distributions
-                try:
-                    if hasattr(target_distribution, 'density'):
-                        # Check if it's a PyTorch distribution that needs tensor input
-                        if hasattr(target_distribution, 'device') or isinstance(target_distribution, torch.nn.Module):
-                            point_tensor = torch.tensor(point, dtype=torch.float32, 
-                                                      device=getattr(target_distribution, 'device', 'cpu'))
-                            density_val = target_distribution.density(point_tensor)
-                            Z[i, j] = density_val.item() if torch.is_tensor(density_val) else density_val
-                        else:
-                            # CPU/numpy distribution
-                            Z[i, j] = target_distribution.density(point)
-                    elif hasattr(target_distribution, 'log_density'):
-                        # Convert log density to density
-                        if hasattr(target_distribution, 'device') or isinstance(target_distribution, torch.nn.Module):
-                            point_tensor = torch.tensor(point, dtype=torch.float32, 
-                                                      device=getattr(target_distribution, 'device', 'cpu'))
-                            log_dens = target_distribution.log_density(point_tensor)
-                            Z[i, j] = torch.exp(log_dens).item()
-                        else:
-                            Z[i, j] = np.exp(target_distribution.log_density(point))
+                # No autograd bookkeeping is needed for a plot
+                with torch.inference_mode():
+                    # cartesian_prod orders the points x-major: point k = (x_grid[k // ny], y_grid[k % ny])
+                    xy = torch.cartesian_prod(torch.from_numpy(x_grid).to(grid_device, grid_dtype),
+                                              torch.from_numpy(y_grid).to(grid_device, grid_dtype))
+                    grid_points = torch.zeros((xy.shape[0], actual_dim), dtype=grid_dtype, device=grid_device)
+                    grid_points[:, :2] = xy
+                    if actual_dim > 2:
+                        grid_points[:, 2:] = chain_mean_gpu.to(grid_device, grid_dtype)
+                    
+                    if hasattr(target_distribution, 'log_density'):
+                        Z_flat = torch.exp(target_distribution.log_density(grid_points))
                     else:
-                        # Fallback: assume uniform density
-                        Z[i, j] = 1.0
-                except Exception as e:
-                    # If density evaluation fails, set to small positive value
-                    Z[i, j] = 1e-10
+                        Z_flat = target_distribution.density(grid_points)
+                    # (nx, ny) -> transpose to meshgrid's (ny, nx) 'xy' layout: Z[i, j] at (x_grid[j], y_grid[i])
+                    Z = Z_flat.reshape(len(x_grid), len(y_grid)).T.float().cpu().numpy()
+            else:
+                # CPU/numpy distribution: no batched interface, evaluate point by point
+                grid_points = np.zeros((X.size, actual_dim))
+                grid_points[:, 0] = X.ravel()
+                grid_points[:, 1] = Y.ravel()
+                if actual_dim > 2:
+                    grid_points[:, 2:] = chain_mean_gpu.cpu().numpy()
+                Z = np.array([target_distribution.density(point) for point in grid_points]).reshape(X.shape)
+        except Exception as e:
+            # If density evaluation fails, set to small positive value
+            Z = np.full_like(X, 1e-10)
         
         # Create contour plot of target density
         contour = plt.contourf(X, Y, Z, levels=20, cmap='Greys', alpha=0.7)
@@ -469,19 +648,21 @@ def run_study(dim, target_name="MultivariateNormalTorch", num_iters=100000, var_
         plt.contour(X, Y, Z, levels=10, colors='white', alpha=0.3, linewidths=0.5)
         
         # Plot MCMC trajectory
-        # Use 5% of total samples for trajectory visualization
-        num_traj_points = int(0.05 * len(x_chain))
-        if len(x_chain) > num_traj_points:
-            indices = np.linspace(0, len(x_chain)-1, num_traj_points, dtype=int)
-            x_traj = x_chain[indices]
-            y_traj = y_chain[indices]
+        # Use 5% of total samples for trajectory visualization, selected on the device
+        num_post = len(chain_post_gpu)
+        num_traj_points = int(0.05 * num_post)
+        if num_post > num_traj_points:
+            indices = torch.linspace(0, num_post - 1, num_traj_points, device=chain_post_gpu.device,
+                                     dtype=torch.float64).long()
         else:
-            x_traj = x_chain
-            y_traj = y_chain
+            indices = torch.arange(num_post, device=chain_post_gpu.device)
+        # Only the ~200 scattered points are copied to the host
+        indices = indices[::max(1, len(indices)//200)]
+        xy_traj = chain_post_gpu[indices, :2].float().cpu().numpy()
         
         # Plot trajectory as very thin line with smaller, less frequent dots
-        # plt.plot(x_traj, y_traj, 'r-', alpha=0.4, linewidth=0.3, label='MCMC Trajectory')
-        plt.scatter(x_traj[::max(1, len(x_traj)//200)], y_traj[::max(1, len(y_traj)//200)], 
+        # plt.plot(xy_traj[:, 0], xy_traj[:, 1], 'r-', alpha=0.4, linewidth=0.3, label='MCMC Trajectory')
+        plt.scatter(xy_traj[:, 0], xy_traj[:, 1], 
                    c='red', s=3, alpha=0.6, zorder=5, label='MCMC Samples')
         
         plt.xlabel('Dimension 1')
@@ -508,6 +689,14 @@ if __name__ == "__main__":
     parser.add_argument("--var_max", type=float, default=3.5, help="Maximum scale parameter value")
     parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility")
     parser.add_argument("--burn_in", type=int, default=1000, help="Burn-in period")
+    parser.add_argument("--batched", action="store_true",
+                      help="Run all scale values as one batched multi-chain simulation (Normal proposal only)")
+    parser.add_argument("--compile_mode", type=str, default=None,
+                      help="torch.compile mode for the MCMC step (e.g. 'reduce-overhead'); disabled by default")
+    parser.add_argument("--cuda_graph", action="store_true",
+                      help="Replay blocks of MCMC steps from a CUDA graph (target log density must be capturable)")
+    parser.add_argument("--bf16_chain", action="store_true",
+                      help="Store chains in bfloat16 (sampling and metrics stay float32)")
     
     # Proposal distribution arguments
     parser.add_argument("--proposal", type=str, default="Normal", choices=["Normal", "Laplace", "UniformRadius"],
@@ -569,6 +758,8 @@ if __name__ == "__main__":
     print(f"🎯 Using {args.proposal} proposal distribution")
     
     results = run_study(args.dim, args.target, args.num_iters, args.var_max, args.seed, args.burn_in, 
-                       args.proposal, proposal_params, **kwargs)
+                       args.proposal, proposal_params, batched=args.batched,
+                       compile_mode=args.compile_mode, use_cuda_graph=args.cuda_graph,
+                       chain_dtype=torch.bfloat16 if args.bf16_chain else None, **kwargs)
 
     print(f"🎉 Finished running experiment with {args.proposal} proposal.") 
\ No newline at end of file
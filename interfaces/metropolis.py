@@ -11,9 +11,16 @@ class MHAlgorithm:
     The step method must be implemented in the subclass.
     
     The chain attribute stores the Markov chain of samples generated by the algorithm.
-    The current state of the algorithm is the last element of the chain.
+    It starts as a list and can be replaced by a pre-allocated (num_states, dim) array with
+    preallocate_chain, which is then written by index. Only the first num_states entries are
+    valid (see get_chain); the current state of the algorithm is the last of these.
     """
-    def __init__(self, dim, var, target_dist: Union[TargetDistribution, TorchTargetDistribution] = None, symmetric=True):
+    def __init__(self, dim, var, target_dist: Union[TargetDistribution, TorchTargetDistribution] = None, symmetric=True,
+                 rng: Optional[np.random.Generator] = None):
+        """rng is the NumPy Generator used for the initial state and by the steps of subclasses.
+        If None, a PCG64 generator is seeded from the legacy global RNG, so np.random.seed still
+        makes runs reproducible."""
+        self.rng = rng if rng is not None else np.random.default_rng(np.random.randint(2**31))
         self.dim = dim
         self.var = var
         self.target_dist = target_dist
@@ -21,19 +28,19 @@ class MHAlgorithm:
         # iid Beta: Check for Beta distribution to initialize within (0.1, 0.9) domain
         if hasattr(target_dist, 'name') and isinstance(target_dist.name, str) and "Beta" in target_dist.name:
             # Initialize within (0.1, 0.9) to be safely away from boundaries
-            initial_point = np.random.uniform(0.2, 0.8, size=dim).astype(np.float32)
+            initial_point = self.rng.uniform(0.2, 0.8, size=dim).astype(np.float32)
             self.chain = [initial_point]
         elif hasattr(target_dist, 'get_name') and callable(target_dist.get_name) and isinstance(target_dist.get_name(), str) and "Beta" in target_dist.get_name():
             # Alternative check if name is a method
-            initial_point = np.random.uniform(0.2, 0.8, size=dim).astype(np.float32)
+            initial_point = self.rng.uniform(0.2, 0.8, size=dim).astype(np.float32)
             self.chain = [initial_point]
         
         # iid Gamma: Check for Gamma distribution to initialize within 5 + noise domain
         elif hasattr(target_dist, 'name') and isinstance(target_dist.name, str) and "Gamma" in target_dist.name:
-            initial_point = 5 + 0.01 * np.random.randn(dim)
+            initial_point = 5 + 0.01 * self.rng.standard_normal(dim)
             self.chain = [initial_point]
         elif hasattr(target_dist, 'get_name') and callable(target_dist.get_name) and isinstance(target_dist.get_name(), str) and "Gamma" in target_dist.get_name():
-            initial_point = 5 + 0.01 * np.random.randn(dim)
+            initial_point = 5 + 0.01 * self.rng.standard_normal(dim)
             self.chain = [initial_point]
         
         # Multimodal: Check for multimodal distribution to initialize at 0
@@ -53,18 +60,20 @@ class MHAlgorithm:
         # Hypercube: initialize within (0.1, 0.9) domain
         elif hasattr(target_dist, 'name') and isinstance(target_dist.name, str) and "Gamma" in target_dist.name:
             # Initialize within (0.1, 0.9) to be safely away from boundaries
-            initial_point = np.random.uniform(0.2, 0.8, size=dim).astype(np.float32)
+            initial_point = self.rng.uniform(0.2, 0.8, size=dim).astype(np.float32)
             self.chain = [initial_point]
         elif hasattr(target_dist, 'get_name') and callable(target_dist.get_name) and isinstance(target_dist.get_name(), str) and "Gamma" in target_dist.get_name():
             # Initialize within (0.1, 0.9) to be safely away from boundaries
-            initial_point = np.random.uniform(0.2, 0.8, size=dim).astype(np.float32)
+            initial_point = self.rng.uniform(0.2, 0.8, size=dim).astype(np.float32)
             self.chain = [initial_point]
         
         else:
-            self.chain = [0.00000001 * np.random.randn(dim)]
+            self.chain = [0.00000001 * self.rng.standard_normal(dim)]
+        self.num_states = 1     # number of valid states stored in the chain
             
         self.symmetric = symmetric
         self.num_acceptances = 0    # use this to calculate acceptance rate
+        self.num_steps = 0          # number of steps taken, the denominator of the acceptance rate
         self.acceptance_rate = 0
         
         # Handle both TargetDistribution and TorchTargetDistribution
@@ -78,20 +87,53 @@ class MHAlgorithm:
             self.target_density = None
 
     def reset(self):
-        """Reset the Markov chain to the initial state."""
-        self.chain = [self.chain[0]]
+        """Reset the Markov chain to the initial state. A pre-allocated chain is kept and reused."""
+        if not isinstance(self.chain, np.ndarray):
+            self.chain = [self.chain[0]]
+        self.num_states = 1
+        self.num_steps = 0
+
+    def preallocate_chain(self, num_iterations, dtype=None):
+        """Replace the chain by a contiguous (num_states + num_iterations, dim) array holding the
+        current states, so the next num_iterations states are written by index. dtype defaults to
+        the dtype of an already pre-allocated chain, else float64."""
+        if dtype is None:
+            dtype = self.chain.dtype if isinstance(self.chain, np.ndarray) else np.float64
+        chain = np.empty((self.num_states + num_iterations, self.dim), dtype=dtype)
+        chain[:self.num_states] = self.chain[:self.num_states]
+        self.chain = chain
+
+    def add_to_chain(self, state):
+        """Append a state to the chain (written in place if the chain is pre-allocated)."""
+        if isinstance(self.chain, np.ndarray):
+            self.chain[self.num_states] = state
+        else:
+            self.chain.append(state)
+        self.num_states += 1
+
+    def get_chain(self):
+        """Return the states of the chain so far (a view if the chain is pre-allocated)."""
+        return self.chain[:self.num_states]
 
     def step(self):
         """Take a step using the Metropolis-Hastings algorithm. Must be implemented in subclass."""
         raise NotImplementedError("Step method must be implemented in subclass")
+
+    def can_run_compiled(self):
+        """Return whether run_compiled can be used instead of repeated calls to step."""
+        return False
+
+    def run_compiled(self, num_iterations):
+        """Take num_iterations steps in a single compiled kernel call. Optional in subclasses."""
+        raise NotImplementedError("run_compiled is not implemented for this algorithm")
     
     def get_curr_state(self):
         """Return the current state of the algorithm."""
-        return self.chain[-1]
+        return self.chain[self.num_states - 1]
     
     def set_curr_state(self, state):
         """Set the current state of the algorithm."""
-        self.chain[-1] = state
+        self.chain[self.num_states - 1] = state
 
     def get_name(self):
         """Return the name of the algorithm as a string."""
@@ -0,0 +1,19 @@
+"""Optional Numba support for the CPU (NumPy) samplers.
+
+Numba is not a required dependency. When it is not installed, `njit` returns the
+decorated function unchanged and `prange` is the builtin `range`, so the compiled
+kernels still run correctly as plain Python (equivalent to their `py_func`).
+"""
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        """Fallback for numba.njit: supports both @njit and @njit(...) usage."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
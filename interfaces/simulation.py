@@ -1,11 +1,33 @@
+import os
+import sys
 import numpy as np
-from scipy.stats import norm
+import matplotlib
+# Headless Linux (e.g. cluster jobs): render with the non-interactive Agg backend
+if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from .metropolis import MHAlgorithm
 from .target import TargetDistribution
+from .numba_compat import njit, prange, NUMBA_AVAILABLE
 from typing import Optional, Callable
 import tqdm
 
+MAX_TRACEPLOT_POINTS = 5000     # traceplots are thinned to about this many points per line
+PLOT_DIR = "images/publishing"  # directory the plotting methods save to
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _mean_squared_jump(chain):
+    """Mean squared jump between consecutive rows of chain, accumulated in float64.
+    Streams the chain once without allocating a diff array."""
+    total = 0.0
+    for i in prange(1, chain.shape[0]):
+        squared_jump = 0.0
+        for j in range(chain.shape[1]):
+            diff = np.float64(chain[i, j]) - np.float64(chain[i - 1, j])
+            squared_jump += diff * diff
+        total += squared_jump
+    return total / (chain.shape[0] - 1)
+
 class MCMCSimulation:
     """Class for running a single MCMC simulation for generating samples from a target distribution 
     and visualizing the various metrics and results."""
@@ -19,39 +41,78 @@ class MCMCSimulation:
                  seed: Optional[int] = None,
                  beta_ladder: Optional[list] = None,
                  swap_acceptance_rate: Optional[float] = None,
-                 burn_in: int = 0):
+                 burn_in: int = 0,
+                 chain_dtype=np.float64):
+        """Initialize the simulation. chain_dtype is the storage type of the chain, e.g. np.float32
+        to halve its memory traffic; proposals and log densities are still computed in float64."""
         self.num_iterations = num_iterations
         self.burn_in = max(0, min(burn_in, num_iterations - 1))  # Ensure valid burn-in
         self.target_dist = target_dist
+        # PCG64 generator shared with the algorithm for the initial state, proposals and acceptance draws.
+        # Without a seed it is derived from the global RNG, so np.random.seed still makes runs reproducible.
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        else:
+            self.rng = np.random.default_rng(np.random.randint(2**31))
         self.algorithm = algorithm(dim, 
                                    sigma, 
                                    target_dist, 
                                    symmetric, 
                                    beta_ladder=beta_ladder, 
-                                   swap_acceptance_rate=swap_acceptance_rate)   # comment out last two lines for standard rwm
-        if seed:
-            np.random.seed(seed)
+                                   swap_acceptance_rate=swap_acceptance_rate,   # comment out these two lines for standard rwm
+                                   rng=self.rng)
+        # Contiguous (num_iterations + 1, dim) chain written by index instead of a list of states
+        self.algorithm.preallocate_chain(num_iterations, dtype=chain_dtype)
+        self._chain_array = None    # NumPy view of the chain, cached by _chain_np
+        # Plot filenames are f"{PLOT_DIR}/{prefix}_{stem}"; the directory is created once here
+        self._plot_stem = f"{target_dist.get_name()}_{self.algorithm.get_name()}_dim{dim}_{num_iterations}iters"
+        os.makedirs(PLOT_DIR, exist_ok=True)
+        self._fig, self._ax = None, None    # figure reused by the plotting methods, see _plot_axes
+        if seed is not None:
+            np.random.seed(seed)    # legacy global RNG, still used by the targets' draw_sample heuristics
 
     
     def reset(self):
         """Reset the simulation to the initial state."""
         self.algorithm.reset()
+        self._chain_array = None
+
+    def _chain_np(self):
+        """Return the chain as a NumPy array, converted once and cached until the next run or reset."""
+        if self._chain_array is None:
+            self._chain_array = np.asarray(self.algorithm.get_chain())
+        return self._chain_array
+
+    def _plot_axes(self):
+        """Return the axes shared by the plotting methods, cleared for a new plot.
+        The figure is created once instead of once per plot."""
+        if self._fig is None:
+            self._fig, self._ax = plt.subplots(figsize=(10, 6))
+        else:
+            self._ax.clear()
+        return self._ax
 
     def has_run(self):
         """Return whether the algorithm has been run."""
-        return len(self.algorithm.chain) > 1
+        return len(self.algorithm.get_chain()) > 1
 
     def generate_samples(self):
         if self.has_run():
             raise ValueError("Please reset the algorithm before running it again.")
         
         print("Running the MCMC simulation...")
-        with tqdm.tqdm(total=self.num_iterations, desc="Running MCMC", unit="iteration") as pbar:
-            for i in range(self.num_iterations):
+        self._chain_array = None
+        if self.algorithm.can_run_compiled():
+            # All iterations in one compiled kernel call, no per-step Python dispatch
+            self.algorithm.run_compiled(self.num_iterations)
+        else:
+            # Let tqdm iterate the range and refresh at most every ~0.1% of iterations
+            # instead of a manual pbar.update(1) on every step
+            for _ in tqdm.tqdm(range(self.num_iterations), desc="Running MCMC", unit="iteration",
+                               mininterval=0.5, miniters=max(1, self.num_iterations // 1000)):
                 self.algorithm.step()
-                pbar.update(1)
 
-        return self.algorithm.chain
+        return self.algorithm.get_chain()
     
     def acceptance_rate(self):
         """Return the acceptance rate of the algorithm."""
@@ -67,18 +128,18 @@ class MCMCSimulation:
         """
         if not self.has_run():
             raise ValueError("The algorithm has not been run yet.")
-        chain = np.array(self.algorithm.chain)
-        
-        # Apply burn-in if specified
-        if self.burn_in > 0 and len(chain) > self.burn_in + 1:
-            chain_post_burnin = chain[self.burn_in:]
-            squared_jumps = np.sum((chain_post_burnin[1:] - chain_post_burnin[:-1]) ** 2, axis=1)
-            return np.mean(squared_jumps)
-        elif self.burn_in == 0:
-            squared_jumps = np.sum((chain[1:] - chain[:-1]) ** 2, axis=1)
-            return np.mean(squared_jumps)
-        else:
+        # Post-burn-in view of the chain (no copy)
+        chain_post_burnin = self._chain_np()[self.burn_in:]
+        if len(chain_post_burnin) < 2:
             return 0.0
+        
+        if NUMBA_AVAILABLE:
+            return _mean_squared_jump(chain_post_burnin)
+        
+        # Without Numba: sum of squared jumps over a single diff buffer (no squared temporary),
+        # accumulated in float64 even if the chain is stored in float32
+        diffs = np.diff(chain_post_burnin, axis=0)
+        return np.einsum('ij,ij->', diffs, diffs, dtype=np.float64) / diffs.shape[0]
     
     def pt_expected_squared_jump_distance(self):
         """Calculate the expected squared jump distance for parallel tempering.
@@ -89,37 +150,41 @@ class MCMCSimulation:
             raise ValueError("The algorithm has not been run yet.")
         return self.algorithm.pt_esjd
 
-    def traceplot(self, single_dim=False, show=False):
+    def traceplot(self, single_dim=False, show=False, dpi=150):
         """Visualize the traceplot of the Markov chain.
         The traceplot plots the values of the parameters 
         against the iteration number in the Markov chain.
+        Use dpi=300 for publication-quality figures.
         """
-        plt.figure(figsize=(10, 6))
         if not self.has_run():
             raise ValueError("The algorithm has not been run yet.")
+        ax = self._plot_axes()
         
-        chain = np.array(self.algorithm.chain)
-        if single_dim:
-            plt.plot(chain[:, 0], label=f"Dimension 1", alpha=0.7, lw=0.5)
-        else:
-            for i in range(self.algorithm.dim):
-                plt.plot(chain[:, i], label=f"Dimension {i + 1}", alpha=0.7, lw=0.5)
+        chain = self._chain_np()
+        # Thin long chains for plotting only (the metrics use the full chain) and rasterize
+        # the lines, which bounds the Matplotlib drawing and PNG encoding cost
+        stride = max(1, len(chain) // MAX_TRACEPLOT_POINTS)
+        iterations = np.arange(0, len(chain), stride)
+        chain_plot = chain[::stride]
+        # One plot call draws a line per column; the legend is skipped for many dimensions
+        lines = ax.plot(iterations, chain_plot[:, :1] if single_dim else chain_plot, alpha=0.7, lw=0.5, rasterized=True)
+        if len(lines) <= 10:
+            ax.legend(lines, [f"Dimension {i + 1}" for i in range(len(lines))])
 
-        plt.xlabel('Iteration')
-        plt.ylabel('Value')
-        plt.legend()
+        ax.set_xlabel('Iteration')
+        ax.set_ylabel('Value')
         # if hasattr(self.algorithm, 'pt_esjd'): # parallel tempering case
         #     plt.title(f'variance = {self.algorithm.var:.3f}, acceptance rate = {self.acceptance_rate():.3f}, ESJD = {self.algorithm.pt_esjd:.5f}')
         # else:
         #     plt.title(f'variance = {self.algorithm.var:.3f}, acceptance rate = {self.acceptance_rate():.3f}, ESJD = {self.expected_squared_jump_distance():.3f}')
-        filename = f"images/publishing/traceplot_{self.target_dist.get_name()}_{self.algorithm.get_name()}_dim{self.algorithm.dim}_{self.num_iterations}iters"
+        filename = f"{PLOT_DIR}/traceplot_{self._plot_stem}"
 
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
+        # Fast PNG compression: larger files, but much less time spent encoding
+        self._fig.savefig(filename, dpi=dpi, bbox_inches='tight', pil_kwargs={"compress_level": 1})
         if show:
             plt.show()
-        plt.clf()
 
-    def samples_histogram(self, num_bins=50, axis=0, show=False):
+    def samples_histogram(self, num_bins=50, axis=0, show=False, dpi=150):
         """Plot a histogram of the samples overlaid with the target density for the first
         coordinate. Use to ensure the correctness of samples (convergence of chain).
         This assumes that the target density can be divided into components.
@@ -128,36 +193,37 @@ class MCMCSimulation:
             samples (ndarray): The samples generated by the Markov chain.
             num_bins (int): The number of bins in the histogram. Default is 50.
             axis (int): The dimension of the samples to plot. Default is 0 (first component)
+            dpi (int): Resolution of the saved figure. Default is 150, use 300 for publication.
         """
         # Generate histogram of samples
-        samples = np.array(self.algorithm.chain)[:, axis]
-        plt.figure(figsize=(10, 6))
-        plt.hist(samples, bins=num_bins, density=True, alpha=0.5, label='Samples')
+        samples = self._chain_np()[:, axis]
+        ax = self._plot_axes()
+        ax.hist(samples, bins=num_bins, density=True, alpha=0.5, label='Samples')
 
         # Generate values for plotting the target density
         # x = np.array([np.array([v]) for v in np.linspace(min(-20, min(samples) - 5), max(20, max(samples) + 5), 1000)])
-        x = np.linspace(min(-20, min(samples) - 2), max(20, max(samples) + 2), 1000)
+        samples_min, samples_max = samples.min(), samples.max()  # NumPy reductions, not Python min/max scans
+        x = np.linspace(min(-20, samples_min - 2), max(20, samples_max + 2), 1000)
         ## For plotting the target density (red dashed line)
-        y = np.zeros_like(x)
         # means = [15.0, 0.0, -15.0]
         # stds = [1.0, 1.0, 1.0]  # You can adjust these standard deviations as needed
         # weights = [1/3, 1/3, 1/3]
-        for i in range(len(x)):
-            y[i] = self.target_dist.density(x[i])   # how to visualize a single component of the target density?
+        y = self.target_dist.density_vec(x)   # density(x[i]) for every value of x at once
 
+        # from scipy.stats import norm   # imported here only if needed, scipy.stats is slow to import
         # for mean, std, weight in zip(means, stds, weights):
         #     y += weight * norm.pdf(x, mean, std)
 
-        plt.plot(x, y, color='red', linestyle='--', linewidth=2, label='Target Density')
-        plt.xlabel('Value')
-        plt.ylabel('Density')
-        plt.legend()
+        ax.plot(x, y, color='red', linestyle='--', linewidth=2, label='Target Density')
+        ax.set_xlabel('Value')
+        ax.set_ylabel('Density')
+        ax.legend()
         # if hasattr(self.algorithm, 'pt_esjd'): # parallel tempering case
         #     plt.title(f'variance = {self.algorithm.var:.3f}, a = {self.acceptance_rate():.3f}, ESJD = {self.algorithm.pt_esjd:.5f}')
         # else:
         #     plt.title(f'variance = {self.algorithm.var:.3f}, a = {self.acceptance_rate():.3f}, ESJD = {self.expected_squared_jump_distance():.3f}')
-        filename = f"images/publishing/hist_{self.target_dist.get_name()}_{self.algorithm.get_name()}_dim{self.algorithm.dim}_{self.num_iterations}iters"
-        plt.savefig(filename, dpi=300, bbox_inches='tight')
+        filename = f"{PLOT_DIR}/hist_{self._plot_stem}"
+        # Fast PNG compression: larger files, but much less time spent encoding
+        self._fig.savefig(filename, dpi=dpi, bbox_inches='tight', pil_kwargs={"compress_level": 1})
         if show:
-            plt.show()
-        plt.clf()
\ No newline at end of file
+            plt.show()
\ No newline at end of file
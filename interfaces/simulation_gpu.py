@@ -53,7 +53,8 @@ class MCMCSimulation_GPU:
             device: GPU device to use ('cuda', 'cpu', or None for auto-detection)
             pre_allocate: Whether to pre-allocate GPU memory for chains
             burn_in: Number of initial samples to discard for MCMC burn-in (default: 0)
-            **kwargs: Additional algorithm-specific parameters
+            **kwargs: Additional algorithm-specific parameters. 'rng_seed' seeds the
+                algorithm's own RNG generator (defaults to seed)
         """
         # Handle backward compatibility and proposal configuration
         if proposal_config is None and sigma is not None:
@@ -118,7 +119,8 @@ class MCMCSimulation_GPU:
                         pre_allocate_steps=num_iterations if pre_allocate else None,
                         burn_in=self.burn_in,
                         use_efficient_rng=kwargs.get('use_efficient_rng', True),
-                        **{k: v for k, v in kwargs.items() if k != 'use_efficient_rng'}
+                        rng_seed=kwargs.get('rng_seed', seed),
+                        **{k: v for k, v in kwargs.items() if k not in ('use_efficient_rng', 'rng_seed')}
                     )
                 else:
                     # Fallback to old sigma-based approach
@@ -162,12 +164,15 @@ class MCMCSimulation_GPU:
         else:
             return len(self.algorithm.chain) > 1
 
-    def generate_samples(self, progress_bar=True):
+    def generate_samples(self, progress_bar=True, synchronize=True):
         """
         Generate samples step-by-step.
         
         Args:
             progress_bar: Whether to show progress bar
+            synchronize: Whether to wait for the GPU to finish. With False, GPU algorithms
+                only enqueue their work on the current CUDA stream and the chain is
+                returned as a GPU tensor that is still being written
             
         Returns:
             Chain of samples
@@ -184,10 +189,14 @@ class MCMCSimulation_GPU:
                 print(f"Using optimized GPU parallel tempering generate_samples method")
             else:
                 print(f"Using optimized GPU {self.algorithm.__class__.__name__} generate_samples method")
+            if not synchronize:
+                # Leave the chain on the device; reading it back would wait for the GPU
+                return self.algorithm.generate_samples(self.num_iterations, synchronize=False)
             chain = self.algorithm.generate_samples(self.num_iterations)
             # Convert to list format for compatibility
             if hasattr(chain, 'cpu'):
-                chain = chain.cpu().numpy().tolist()
+                # .float(): numpy has no bfloat16 for chains stored in lower precision
+                chain = chain.float().cpu().numpy().tolist()
             elif isinstance(chain, torch.Tensor):
                 chain = chain.tolist()
         else:
@@ -218,6 +227,18 @@ class MCMCSimulation_GPU:
         # The burn-in is already excluded in the acceptance rate calculation
         return self.algorithm.acceptance_rate
 
+    def acceptance_rate_tensor(self):
+        """Return the acceptance rate as a 0-d device tensor, excluding burn-in samples.
+        
+        Unlike acceptance_rate(), this does not wait for the GPU, so metrics of many
+        simulations can be collected and moved to the host together.
+        """
+        if not self.has_run():
+            raise ValueError("The algorithm has not been run yet.")
+        if hasattr(self.algorithm, 'acceptance_rate_tensor'):
+            return self.algorithm.acceptance_rate_tensor()
+        return torch.tensor(self.algorithm.acceptance_rate, dtype=torch.float32, device=self.device)
+
     def expected_squared_jump_distance(self):
         """
         Calculate the expected squared jump distance using optimized GPU computation if available,
@@ -243,6 +264,14 @@ class MCMCSimulation_GPU:
             else:
                 return 0.0
     
+    def expected_squared_jump_distance_tensor(self):
+        """Return the expected squared jump distance as a 0-d device tensor, excluding burn-in samples."""
+        if not self.has_run():
+            raise ValueError("The algorithm has not been run yet.")
+        if hasattr(self.algorithm, 'expected_squared_jump_distance_tensor'):
+            return self.algorithm.expected_squared_jump_distance_tensor()
+        return torch.tensor(self.expected_squared_jump_distance(), dtype=torch.float32, device=self.device)
+    
     def pt_expected_squared_jump_distance(self):
         """Calculate the expected squared jump distance for parallel tempering."""
         if not self.has_run():
@@ -320,7 +349,7 @@ class MCMCSimulation_GPU:
         
         # Get chain data (potentially from GPU)
         if use_gpu_data and hasattr(self.algorithm, 'get_chain_gpu'):
-            chain = self.algorithm.get_chain_gpu().cpu().numpy()
+            chain = self.algorithm.get_chain_gpu().float().cpu().numpy()
         else:
             chain = np.array(self.algorithm.chain)
         
@@ -351,7 +380,7 @@ class MCMCSimulation_GPU:
         # Get chain data (potentially from GPU)
         if use_gpu_data and hasattr(self.algorithm, 'get_chain_gpu'):
             chain_tensor = self.algorithm.get_chain_gpu()
-            samples = chain_tensor[:, axis].cpu().numpy()
+            samples = chain_tensor[:, axis].float().cpu().numpy()
         else:
             samples = np.array(self.algorithm.chain)[:, axis]
         
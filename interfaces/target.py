@@ -1,6 +1,14 @@
+import numpy as np
+
+
 class TargetDistribution:
     """General interface for target distributions."""
 
+    # Optional Numba-compiled log density used by the compiled CPU samplers. Subclasses that
+    # support it set this to staticmethod(f) for a module-level @njit function
+    # f(x, params) -> float, where params is the tuple returned by log_density_params().
+    log_density_njit = None
+
     def __init__(self, dimension):
         self.dim = dimension
 
@@ -8,8 +16,17 @@ class TargetDistribution:
         """Compute the density of the distribution at a given point x."""
         raise NotImplementedError("Subclasses must implement the density method.")
 
+    def density_vec(self, x):
+        """Compute the density at every value of the 1D array x, as density(x[i]) would.
+        Subclasses should override this with a vectorized implementation."""
+        return np.array([self.density(x_i) for x_i in x])
+
     def draw_sample(self, beta=1.0):
         """Draw a sample from the target distribution. This is meant to be a cheap heuristic
         used for constructing the temperature ladder in parallel tempering.
         Do not use this to draw samples in an actual Metropolis algorithm."""
-        raise NotImplementedError("Subclasses must implement the draw_sample method.")
\ No newline at end of file
+        raise NotImplementedError("Subclasses must implement the draw_sample method.")
+
+    def log_density_params(self):
+        """Return the tuple of arrays/constants passed to log_density_njit."""
+        return ()
@@ -88,4 +88,5 @@ def _sample_laplace_into_jit(output_tensor: torch.Tensor, scale_vector: torch.Te
     # Transform: X = -scale * sign(U) * ln(1 - 2*|U|)
     abs_u.mul_(-2.0).clamp_(min=-0.999999)
     torch.log1p(abs_u, out=abs_u)
-    output_tensor = -scale_vector.unsqueeze(0) * sign_u * abs_u
\ No newline at end of file
+    torch.mul(sign_u, abs_u, out=output_tensor)
+    output_tensor.mul_(-scale_vector.unsqueeze(0))
\ No newline at end of file
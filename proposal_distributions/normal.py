@@ -1,5 +1,5 @@
 import torch
-from typing import Optional
+from typing import Optional, Union
 from .base import ProposalDistribution
 
 class NormalProposal(ProposalDistribution):
@@ -8,27 +8,32 @@ class NormalProposal(ProposalDistribution):
     Ultra-optimized for GPU with JIT compilation and efficient batch generation.
     """
     
-    def __init__(self, dim: int, base_variance_scalar: float, beta: float, 
+    def __init__(self, dim: int, base_variance_scalar: Union[float, torch.Tensor], beta: float, 
                  device: torch.device, dtype: torch.dtype, 
                  rng_generator: Optional[torch.Generator] = None):
         """Initialize Normal proposal.
         
         Args:
-            base_variance_scalar: Base variance (before beta scaling)
+            base_variance_scalar: Base variance (before beta scaling). May be a 0-d tensor
+                already on the device, e.g. one entry of a variance schedule; it is then
+                used as is and not checked, since checking it would wait for the GPU
             Other args: See ProposalDistribution.__init__
         """
         super().__init__(dim, beta, device, dtype, rng_generator)
         self.name = "Normal"
         
-        if base_variance_scalar <= 0:
-            raise ValueError("base_variance_scalar must be positive")
+        if isinstance(base_variance_scalar, torch.Tensor):
+            base_variance = base_variance_scalar.to(device=self.device, dtype=self.dtype)
+        else:
+            if base_variance_scalar <= 0:
+                raise ValueError("base_variance_scalar must be positive")
+            base_variance = torch.tensor(base_variance_scalar, device=self.device, dtype=self.dtype)
         
         # Effective variance scaled by beta (higher beta = smaller proposals)
-        effective_variance = base_variance_scalar / self.beta
+        effective_variance = base_variance / self.beta
         
         # Pre-compute standard deviation for efficient sampling
-        self.std_dev = torch.sqrt(torch.tensor(effective_variance, 
-                                             device=self.device, dtype=self.dtype))
+        self.std_dev = torch.sqrt(effective_variance)
     
     def sample(self, n_samples: int) -> torch.Tensor:
         """Generate Normal proposal increments with maximum GPU efficiency."""
@@ -123,6 +123,11 @@ class SuperFunnelTorch(TorchTargetDistribution):
         tau_beta ~ HalfCauchy(0, prior_tau_scale)
     Likelihood:
         y_ij ~ Bernoulli(logit_inv(alpha_j + x_ij^T beta_j))
+
+    The data is either a list of J tensors per group (X_j of shape (n_j, K), Y_j of shape
+    (n_j,)), or, when every group has the same size n, a single X tensor of shape (J, n, K)
+    and Y tensor of shape (J, n). The stacked form evaluates the likelihood of all groups
+    in one batched call instead of one per group.
     """
 
     def __init__(self, J, K, X_data, Y_data, 
@@ -134,6 +139,24 @@ class SuperFunnelTorch(TorchTargetDistribution):
         dim = J + J * K + 1 + K + 1 + 1
         super().__init__(dim, device)
 
+        if isinstance(X_data, torch.Tensor) or isinstance(Y_data, torch.Tensor):
+            if not (isinstance(X_data, torch.Tensor) and isinstance(Y_data, torch.Tensor)):
+                raise ValueError("X_data and Y_data must both be lists or both be PyTorch tensors.")
+            if X_data.ndim != 3 or X_data.shape[0] != J or X_data.shape[2] != K:
+                raise ValueError(f"X_data must have shape (J={J}, n, K={K}). Got {X_data.shape}")
+            if Y_data.shape != X_data.shape[:2]:
+                raise ValueError(f"Y_data must have shape (J, n) = {tuple(X_data.shape[:2])}. Got {Y_data.shape}")
+            self.X_stacked = X_data.to(self.device).to(torch.float32)
+            self.Y_stacked = Y_data.to(self.device).to(torch.float32) # Ensure Y is float for calcs
+            # Per-group views for code that expects the list form
+            self.X_data = list(self.X_stacked.unbind(0))
+            self.Y_data = list(self.Y_stacked.unbind(0))
+            self.n_j_array = torch.full((J,), X_data.shape[1], device=self.device, dtype=torch.long)
+            self._init_prior_constants(prior_hypermean_std, prior_tau_scale)
+            return
+
+        self.X_stacked = None
+        self.Y_stacked = None
         if not (isinstance(X_data, list) and len(X_data) == J):
             raise ValueError(f"X_data must be a list of J={J} tensors.")
         if not (isinstance(Y_data, list) and len(Y_data) == J):
@@ -154,6 +177,10 @@ class SuperFunnelTorch(TorchTargetDistribution):
             self.Y_data.append(Y_data[j].to(self.device).to(torch.float32)) # Ensure Y is float for calcs
             self.n_j_array[j] = Y_data[j].shape[0]
 
+        self._init_prior_constants(prior_hypermean_std, prior_tau_scale)
+
+    def _init_prior_constants(self, prior_hypermean_std, prior_tau_scale):
+        """Pre-compute the prior constants on the device."""
         self.prior_hypermean_std = torch.tensor(prior_hypermean_std, device=self.device, dtype=torch.float32)
         self.prior_hypermean_var = self.prior_hypermean_std**2
         self.log_prior_hypermean_var = torch.log(self.prior_hypermean_var)
@@ -215,20 +242,26 @@ class SuperFunnelTorch(TorchTargetDistribution):
         # The initial log_p[~valid_mask] = -torch.inf will dominate if any tau is bad.
 
         # Log-Likelihood LL = sum_j sum_i [y_ij * logsigmoid(eta_ij) + (1-y_ij) * logsigmoid(-eta_ij)]
-        current_LL = torch.zeros(batch_size, device=self.device, dtype=torch.float32)
-        for j in range(self.J):
-            alpha_j_b = alphas[:, j]  # (batch_size,)
-            beta_j_b = betas[:, j, :]  # (batch_size, K)
-            X_j = self.X_data[j]      # (n_j, K)
-            Y_j = self.Y_data[j]      # (n_j,)
-
-            # eta_j_b = alpha_j_b.unsqueeze(1) + torch.matmul(X_j, beta_j_b.T).T 
-            # X_j (n_j,K), beta_j_b.T (K,batch) -> (n_j,batch) -> .T (batch,n_j)
-            eta_j_b = alpha_j_b.unsqueeze(1) + torch.einsum('nk,bk->bn', X_j, beta_j_b)
+        if self.X_stacked is not None:
+            # All groups at once: eta (batch, J, n)
+            eta_b = alphas.unsqueeze(2) + torch.einsum('jnk,bjk->bjn', self.X_stacked, betas)
+            Y_b = self.Y_stacked.unsqueeze(0)
+            current_LL = (Y_b * F.logsigmoid(eta_b) + (1 - Y_b) * F.logsigmoid(-eta_b)).sum(dim=(1, 2))
+        else:
+            current_LL = torch.zeros(batch_size, device=self.device, dtype=torch.float32)
+            for j in range(self.J):
+                alpha_j_b = alphas[:, j]  # (batch_size,)
+                beta_j_b = betas[:, j, :]  # (batch_size, K)
+                X_j = self.X_data[j]      # (n_j, K)
+                Y_j = self.Y_data[j]      # (n_j,)
+
+                # eta_j_b = alpha_j_b.unsqueeze(1) + torch.matmul(X_j, beta_j_b.T).T 
+                # X_j (n_j,K), beta_j_b.T (K,batch) -> (n_j,batch) -> .T (batch,n_j)
+                eta_j_b = alpha_j_b.unsqueeze(1) + torch.einsum('nk,bk->bn', X_j, beta_j_b)
             
-            log_p_y_j = (Y_j.unsqueeze(0) * F.logsigmoid(eta_j_b) + 
-                         (1 - Y_j.unsqueeze(0)) * F.logsigmoid(-eta_j_b)).sum(dim=1)
-            current_LL += log_p_y_j
+                log_p_y_j = (Y_j.unsqueeze(0) * F.logsigmoid(eta_j_b) + 
+                             (1 - Y_j.unsqueeze(0)) * F.logsigmoid(-eta_j_b)).sum(dim=1)
+                current_LL += log_p_y_j
         log_p += current_LL
 
         # Log-Prior for alphas: sum_j N(alpha_j | mu_alpha, tau_alpha^2)
@@ -1,10 +1,21 @@
 import numpy as np
 from interfaces import TargetDistribution
+from interfaces.numba_compat import njit
+
+@njit(cache=True)
+def hypercube_log_density_njit(x, params):
+    """Log density of the uniform hypercube, params = (left_boundary, right_boundary)."""
+    left_boundary, right_boundary = params
+    for i in range(x.shape[0]):
+        if x[i] < left_boundary or x[i] > right_boundary:
+            return -np.inf
+    return 0.0
 
 class Hypercube(TargetDistribution):
     """
     Class representing the hypercube target density.
     """
+    log_density_njit = staticmethod(hypercube_log_density_njit)
 
     def __init__(self, dim, left_boundary=0.0, right_boundary=1.0):
         """
@@ -52,6 +63,24 @@ class Hypercube(TargetDistribution):
         """
         return np.prod([self.density_1d(x[i]) for i in range(self.dim)])
 
+    def density_vec(self, x):
+        """
+        Evaluates the individual component (1d) density function at every value of the array x.
+        density() only accepts full points, so this is the component density rather than density(x[i]).
+
+        Args:
+            x (np.ndarray): 1D array of values.
+
+        Returns:
+            np.ndarray: 1 where the value is within the boundaries, 0 otherwise.
+        """
+        x = np.asarray(x)
+        return ((x >= self.left_boundary) & (x <= self.right_boundary)).astype(float)
+
+    def log_density_params(self):
+        """Return (left_boundary, right_boundary) for hypercube_log_density_njit."""
+        return (float(self.left_boundary), float(self.right_boundary))
+
     def draw_sample(self):
         """
         Draws a sample from the hypercube target density.
@@ -1,9 +1,34 @@
 import numpy as np
+import math
 from interfaces import TargetDistribution
+from interfaces.numba_compat import njit
 from scipy.stats import gamma, beta
 
+@njit(cache=True)
+def iid_gamma_log_density_njit(x, params):
+    """Log density of a product of iid Gamma distributions, params = (shape, scale, log_norm_const)."""
+    shape, scale, log_norm_const = params
+    log_density = 0.0
+    for i in range(x.shape[0]):
+        if x[i] <= 0:
+            return -np.inf
+        log_density += (shape - 1) * np.log(x[i]) - x[i] / scale + log_norm_const
+    return log_density
+
+@njit(cache=True)
+def iid_beta_log_density_njit(x, params):
+    """Log density of a product of iid Beta distributions, params = (alpha, beta, log_norm_const)."""
+    alpha, beta_param, log_norm_const = params
+    log_density = 0.0
+    for i in range(x.shape[0]):
+        if x[i] <= 0 or x[i] >= 1:
+            return -np.inf
+        log_density += (alpha - 1) * np.log(x[i]) + (beta_param - 1) * np.log(1 - x[i]) + log_norm_const
+    return log_density
+
 class IIDGamma(TargetDistribution):
     """Class for a product of iid gamma distributions."""
+    log_density_njit = staticmethod(iid_gamma_log_density_njit)
 
     def __init__(self, dimension, shape=2, scale=3):
         """Initialize the product of iid Gamma distribution.
@@ -36,6 +61,23 @@ class IIDGamma(TargetDistribution):
         """
         return np.prod(gamma.pdf(x, a=self.shape, scale=self.scale))
     
+    def density_vec(self, x):
+        """
+        Evaluate the 1D Gamma density at every value of the array x.
+
+        Parameters:
+        x (np.ndarray): 1D array of values.
+
+        Returns:
+        np.ndarray: The density evaluated at each value of x.
+        """
+        return gamma.pdf(x, a=self.shape, scale=self.scale)
+
+    def log_density_params(self):
+        """Return (shape, scale, log_norm_const) for iid_gamma_log_density_njit."""
+        log_norm_const = -math.lgamma(self.shape) - self.shape * math.log(self.scale)
+        return (float(self.shape), float(self.scale), log_norm_const)
+
     def draw_sample(self, beta=1.0):
         """Draw a sample from the target distribution. This is meant to be a cheap heuristic
         used for constructing the temperature ladder in parallel tempering.
@@ -46,6 +88,7 @@ class IIDGamma(TargetDistribution):
 
 class IIDBeta(TargetDistribution):
     """Class for a product of iid Beta distributions."""
+    log_density_njit = staticmethod(iid_beta_log_density_njit)
 
     def __init__(self, dimension, alpha=2, beta=3):
         """Initialize the product of iid Beta distribution.
@@ -81,6 +124,23 @@ class IIDBeta(TargetDistribution):
         
         return np.prod(beta.pdf(x, a=self.alpha, b=self.beta))
     
+    def density_vec(self, x):
+        """
+        Evaluate the 1D Beta density at every value of the array x.
+
+        Parameters:
+        x (np.ndarray): 1D array of values.
+
+        Returns:
+        np.ndarray: The density evaluated at each value of x.
+        """
+        return beta.pdf(x, a=self.alpha, b=self.beta)
+
+    def log_density_params(self):
+        """Return (alpha, beta, log_norm_const) for iid_beta_log_density_njit."""
+        log_norm_const = math.lgamma(self.alpha + self.beta) - math.lgamma(self.alpha) - math.lgamma(self.beta)
+        return (float(self.alpha), float(self.beta), log_norm_const)
+
     def draw_sample(self, beta_temp=1.0):
         """Draw a sample from the target distribution. This is meant to be a cheap heuristic
         used for constructing the temperature ladder in parallel tempering.
@@ -1,13 +1,44 @@
 import numpy as np
 from interfaces import TargetDistribution
+from interfaces.numba_compat import njit
 from scipy.stats import multivariate_normal
 
+@njit(cache=True)
+def gaussian_mixture_log_density_njit(x, params):
+    """Log density of a Gaussian mixture, params = (means, cov_invs, log_norm_consts, log_weights),
+    computed as a logsumexp over the components."""
+    means, cov_invs, log_norm_consts, log_weights = params
+    num_components = means.shape[0]
+    log_terms = np.empty(num_components)
+    for k in range(num_components):
+        centered = x - means[k]
+        log_terms[k] = log_weights[k] + log_norm_consts[k] - 0.5 * np.dot(centered, np.dot(cov_invs[k], centered))
+    max_log_term = log_terms.max()
+    return max_log_term + np.log(np.sum(np.exp(log_terms - max_log_term)))
+
+@njit(cache=True)
+def rough_carpet_log_density_njit(x, params):
+    """Log density of a rough carpet distribution, params = (modes, log_weights, scaling_factors),
+    a sum over coordinates of 1D three-mode Gaussian mixture log densities."""
+    modes, log_weights, scaling_factors = params
+    log_density = 0.0
+    log_terms = np.empty(modes.shape[0])
+    for i in range(x.shape[0]):
+        y = scaling_factors[i] * x[i]
+        for k in range(modes.shape[0]):
+            log_terms[k] = log_weights[k] - 0.5 * (y - modes[k]) ** 2
+        max_log_term = log_terms.max()
+        log_density += (np.log(scaling_factors[i]) - 0.5 * np.log(2 * np.pi)
+                        + max_log_term + np.log(np.sum(np.exp(log_terms - max_log_term))))
+    return log_density
+
 class ThreeMixtureDistribution(TargetDistribution):
     """Class for a multimodal target distribution with three modes:
         one at (-c, 0, 0, ..., 0), 
         one at (0, 0, 0, ..., 0), 
         and one at (c, 0, 0, ..., 0) where c is some constant
         that is defined by the target distribution init method."""
+    log_density_njit = staticmethod(gaussian_mixture_log_density_njit)
 
     def __init__(self, dimension, scaling=False):
         """Initialize the multimodal distribution with three modes.
@@ -51,6 +82,30 @@ class ThreeMixtureDistribution(TargetDistribution):
             density += 1/3 * multivariate_normal.pdf(x, mean=mean, cov=cov)
 
         return density
+
+    def density_vec(self, x):
+        """Compute density(x[i]) at every value of the 1D array x, for all values at once.
+        A scalar passed to density() is broadcast to the point (x[i], ..., x[i]), so this
+        evaluates the mixture density at those diagonal points.
+        Args:
+            x (np.ndarray): 1D array of values.
+
+        Returns:
+            np.ndarray: The density at each diagonal point.
+        """
+        points = np.repeat(np.asarray(x, dtype=float)[:, None], self.dim, axis=1)
+        density = np.zeros(points.shape[0])
+        for mean, cov in zip(self.means, self.covs):
+            density += 1/3 * multivariate_normal.pdf(points, mean=mean, cov=cov)
+        return density
+    
+    def log_density_params(self):
+        """Return (means, cov_invs, log_norm_consts, log_weights) for gaussian_mixture_log_density_njit."""
+        covs = np.array(self.covs, dtype=np.float64)
+        log_dets = np.linalg.slogdet(covs)[1]
+        log_norm_consts = -0.5 * (self.dim * np.log(2 * np.pi) + log_dets)
+        log_weights = np.full(len(self.means), np.log(1/3))
+        return (np.array(self.means, dtype=np.float64), np.linalg.inv(covs), log_norm_consts, log_weights)
     
     def draw_sample(self, beta=1):
         """Draw a sample from the target distribution. This is meant to be a cheap heuristic
@@ -65,6 +120,7 @@ class ThreeMixtureDistribution(TargetDistribution):
 
 class RoughCarpetDistribution(TargetDistribution):
     """Class for 'rough carpet' multimodal target distributions that are products of 1D multimodal distributions."""
+    log_density_njit = staticmethod(rough_carpet_log_density_njit)
 
     def __init__(self, dimension, scaling=False):
         super().__init__(dimension)
@@ -103,6 +159,19 @@ class RoughCarpetDistribution(TargetDistribution):
         else:  
             return np.prod([self.density_1d(x[i]) for i in range(self.dim)])
 
+    def density_vec(self, x):
+        """Compute the density of the first coordinate at every value of the 1D array x."""
+        x = np.asarray(x)
+        if hasattr(self, 'scaling_factors'):
+            return self.scaling_factors[0] * self.density_1d(self.scaling_factors[0] * x)
+        return self.density_1d(x)
+
+    def log_density_params(self):
+        """Return (modes, log_weights, scaling_factors) for rough_carpet_log_density_njit."""
+        scaling_factors = getattr(self, 'scaling_factors', np.ones(self.dim))
+        return (np.array(self.modes, dtype=np.float64), np.log(np.array(self.weights, dtype=np.float64)),
+                np.asarray(scaling_factors, dtype=np.float64))
+
     def draw_sample(self, beta=1):
         """Draw a sample from the target distribution. This is meant to be a cheap heuristic
         used for constructing the temperature ladder in parallel tempering.
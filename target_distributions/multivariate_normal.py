@@ -1,12 +1,21 @@
 import numpy as np
 from interfaces import TargetDistribution
+from interfaces.numba_compat import njit
 from scipy.stats import norm, multivariate_normal
 
+@njit(cache=True)
+def mvn_log_density_njit(x, params):
+    """Log density of a multivariate normal, params = (mean, cov_inv, log_norm_const)."""
+    mean, cov_inv, log_norm_const = params
+    centered = x - mean
+    return log_norm_const - 0.5 * np.dot(centered, np.dot(cov_inv, centered))
+
 class MultivariateNormal(TargetDistribution):
     """
     Class representing a multivariate normal distribution.
     Default has zero mean and identity covariance matrix.
     """
+    log_density_njit = staticmethod(mvn_log_density_njit)
 
     def __init__(self, dim, mean=None, cov=None):
         """
@@ -44,6 +53,18 @@ class MultivariateNormal(TargetDistribution):
         """
         return norm.pdf(x, loc=self.mean[0], scale=np.sqrt(self.cov[0][0]))
     
+    def density_vec(self, x):
+        """
+        Evaluates the 1D (first component) PDF at every value of the array x.
+
+        Args:
+            x (np.ndarray): 1D array of values.
+
+        Returns:
+            np.ndarray: The value of the PDF at each value of x.
+        """
+        return self.density_1d(np.asarray(x))
+    
     def density(self, x):
         """
         Evaluates the probability density function (PDF) at a point x.
@@ -58,5 +79,13 @@ class MultivariateNormal(TargetDistribution):
             return self.density_1d(x)
         return multivariate_normal.pdf(x, mean=self.mean, cov=self.cov)
 
+    def log_density_params(self):
+        """Return (mean, cov_inv, log_norm_const) for mvn_log_density_njit."""
+        mean = np.asarray(self.mean, dtype=np.float64)
+        cov = np.asarray(self.cov, dtype=np.float64)
+        _, log_det = np.linalg.slogdet(cov)
+        log_norm_const = -0.5 * (self.dim * np.log(2 * np.pi) + log_det)
+        return (mean, np.linalg.inv(cov), log_norm_const)
+
     def draw_sample(self, beta=1):
         return np.random.multivariate_normal(self.mean, self.cov / beta)
\ No newline at end of file
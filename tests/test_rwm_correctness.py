@@ -13,8 +13,12 @@ import torch
 import numpy as np
 import time
 from algorithms.rwm import RandomWalkMH
+from algorithms.pt_rwm import ParallelTemperingRWM
+from interfaces.numba_compat import NUMBA_AVAILABLE
 from algorithms.rwm_gpu_optimized import RandomWalkMH_GPU_Optimized, ultra_fused_mcmc_step_basic
+from algorithms.rwm_gpu_batched import RandomWalkMH_GPU_Batched
 from target_distributions import MultivariateNormal, MultivariateNormalTorch
+from target_distributions import ThreeMixtureDistribution, RoughCarpetDistribution, Hypercube, IIDGamma, IIDBeta
 # Import new funnel distributions
 from target_distributions import NealFunnelTorch, SuperFunnelTorch
 import matplotlib.pyplot as plt
@@ -520,7 +524,7 @@ def test_funnel_distributions():
         num_samples = 2000
         burn_in = 500
         
-        neal_funnel = NealFunnelTorch(dimension=dim)
+        neal_funnel = NealFunnelTorch(dim=dim)
         print(f"      Created {neal_funnel.get_name()}")
         
         # Use smaller proposal variance for funnel (challenging geometry)
@@ -664,6 +668,34 @@ def test_funnel_distributions():
         traceback.print_exc()
         return False
 
+def test_super_funnel_stacked_data():
+    """Test that SuperFunnelTorch gives the same density for stacked (J, n, K) data as for per-group lists."""
+    print("\n🌪️ Testing Super Funnel Stacked Data...")
+    
+    try:
+        J, K = 3, 2
+        torch.manual_seed(321)
+        X_stacked = torch.randn(J, 10, K)
+        Y_stacked = torch.bernoulli(torch.sigmoid(0.5 * X_stacked.sum(dim=-1)))
+        funnel_stacked = SuperFunnelTorch(J, K, X_stacked, Y_stacked)
+        funnel_list = SuperFunnelTorch(J, K, list(X_stacked.unbind(0)), list(Y_stacked.unbind(0)))
+        theta = torch.randn(8, funnel_list.dim, device=funnel_list.device)
+        theta[:, -2:] = theta[:, -2:].abs() + 0.1  # Valid tau_alpha, tau_beta
+        all_tests_pass = torch.allclose(funnel_stacked.log_density(theta), funnel_list.log_density(theta),
+                                        rtol=1e-5, atol=1e-4)
+        
+        if all_tests_pass:
+            print("   ✅ Stacked Super Funnel data matches per-group data")
+        else:
+            print("   ❌ Stacked Super Funnel data gives a different log density")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ Super Funnel stacked data test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def test_burnin_and_sample_counting():
     """Test burn-in handling and sample counting accuracy."""
     print("\n🔥 Testing Burn-in and Sample Counting...")
@@ -861,6 +893,377 @@ def test_comprehensive_target_distributions():
         traceback.print_exc()
         return False
 
+def test_batched_sweep():
+    """Test that the batched multi-chain RWM matches single-chain behaviour per variance."""
+    print("\n🧮 Testing Batched Variance Sweep...")
+    
+    try:
+        dim = 5
+        num_samples = 3000
+        burn_in = 500
+        variances = [0.05, 2.38**2 / dim, 10.0]
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        
+        target_dist = MultivariateNormalTorch(dim)
+        
+        torch.manual_seed(2024)
+        batched = RandomWalkMH_GPU_Batched(
+            dim, variances, target_dist,
+            burn_in=burn_in,
+            pre_allocate_steps=num_samples,
+            device=device
+        )
+        chains = batched.generate_samples(num_samples)
+        acc_rates = batched.acceptance_rates_gpu().cpu()
+        esjds = batched.expected_squared_jump_distances_gpu().cpu()
+        
+        print(f"      Chain shape: {tuple(chains.shape)}")
+        print(f"      Acceptance rates: {acc_rates.tolist()}")
+        print(f"      ESJDs: {esjds.tolist()}")
+        
+        shape_ok = tuple(chains.shape) == (num_samples, len(variances), dim)
+        # Acceptance rate must decrease as the proposal variance grows
+        monotone_ok = bool(acc_rates[0] > acc_rates[1] > acc_rates[2])
+        
+        # Each chain must agree with a single-chain run at the same variance
+        single = RandomWalkMH_GPU_Optimized(
+            dim=dim,
+            var=variances[1],
+            target_dist=target_dist,
+            burn_in=burn_in,
+            pre_allocate_steps=num_samples,
+            device=device
+        )
+        single.generate_samples(num_samples)
+        single_acc_rate = single.acceptance_rate
+        print(f"      Single-chain acceptance rate: {single_acc_rate:.3f}")
+        consistent_ok = abs(single_acc_rate - acc_rates[1].item()) < 0.1
+        
+        all_tests_pass = shape_ok and monotone_ok and consistent_ok
+        if all_tests_pass:
+            print("   ✅ Batched sweep matches single-chain behaviour")
+        else:
+            print("   ❌ Batched sweep test failed")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ Batched sweep test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_cuda_graph_replay():
+    """Test that replaying blocks of steps from a CUDA graph gives the same chain as stepping."""
+    print("\n🎞️  Testing CUDA Graph Replay...")
+    
+    if not torch.cuda.is_available():
+        print("   ⚠️  CUDA not available - skipping CUDA graph test")
+        return True
+    
+    try:
+        dim = 5
+        num_samples = 1000
+        burn_in = 100  # 1100 steps: 4 graph blocks of 256 + 76 single steps
+        target_dist = MultivariateNormalTorch(dim)
+        
+        chains = []
+        acc_rates = []
+        for use_cuda_graph in (False, True):
+            np.random.seed(31)
+            rwm = RandomWalkMH_GPU_Optimized(
+                dim=dim,
+                var=2.38**2 / dim,
+                target_dist=target_dist,
+                burn_in=burn_in,
+                pre_allocate_steps=num_samples,
+                device='cuda',
+                rng_seed=31,
+                use_cuda_graph=use_cuda_graph,
+                cuda_graph_block_size=256
+            )
+            chains.append(rwm.generate_samples(num_samples).clone())
+            acc_rates.append(rwm.acceptance_rate)
+        
+        print(f"      Acceptance rates (steps / graph): {acc_rates[0]:.3f} / {acc_rates[1]:.3f}")
+        
+        all_tests_pass = (chains[0].shape == chains[1].shape and
+                          torch.allclose(chains[0], chains[1], atol=1e-5) and
+                          abs(acc_rates[0] - acc_rates[1]) < 1e-9)
+        if all_tests_pass:
+            print("   ✅ CUDA graph replay matches step-by-step sampling")
+        else:
+            print("   ❌ CUDA graph replay gives a different chain")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ CUDA graph test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_bf16_chain_storage():
+    """Test that storing the chain in bfloat16 leaves the ESJD essentially unchanged."""
+    print("\n🗜️  Testing bfloat16 Chain Storage...")
+    
+    try:
+        dim = 10
+        num_samples = 20000
+        burn_in = 1000
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        target_dist = MultivariateNormalTorch(dim)
+        
+        esjds = []
+        chain_dtypes = []
+        for chain_dtype in (torch.float32, torch.bfloat16):
+            # Same seeds: the float32 states, and hence the accept decisions, are identical
+            np.random.seed(7)
+            torch.manual_seed(7)
+            rwm = RandomWalkMH_GPU_Optimized(
+                dim=dim,
+                var=2.38**2 / dim,
+                target_dist=target_dist,
+                burn_in=burn_in,
+                pre_allocate_steps=num_samples,
+                device=device,
+                rng_seed=7,
+                chain_dtype=chain_dtype
+            )
+            rwm.generate_samples(num_samples)
+            esjds.append(rwm.expected_squared_jump_distance_gpu())
+            chain_dtypes.append(rwm.get_chain_gpu().dtype)
+        
+        relative_error = abs(esjds[1] - esjds[0]) / esjds[0]
+        print(f"      ESJD float32: {esjds[0]:.6f}, bfloat16: {esjds[1]:.6f} (relative error {relative_error:.2e})")
+        
+        all_tests_pass = chain_dtypes[1] == torch.bfloat16 and relative_error < 1e-3
+        if all_tests_pass:
+            print("   ✅ bfloat16 chain storage preserves the ESJD")
+        else:
+            print("   ❌ bfloat16 chain storage changes the ESJD")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ bfloat16 chain storage test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_mvn_fused_step():
+    """Test that the fused MultivariateNormal step reproduces the generic step."""
+    print("\n🧮 Testing Fused MultivariateNormal Step...")
+    
+    try:
+        dim = 5
+        num_samples = 2000
+        device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        target_dist = MultivariateNormalTorch(dim)
+        
+        chains = []
+        acceptance_rates = []
+        for use_mvn_fused_step in (False, True):
+            np.random.seed(11)
+            torch.manual_seed(11)
+            rwm = RandomWalkMH_GPU_Optimized(
+                dim=dim,
+                var=2.38**2 / dim,
+                target_dist=target_dist,
+                burn_in=100,
+                pre_allocate_steps=num_samples,
+                device=device,
+                rng_seed=11
+            )
+            rwm.use_mvn_fused_step = use_mvn_fused_step
+            rwm.generate_samples(num_samples)
+            chains.append(rwm.get_chain_gpu())
+            acceptance_rates.append(rwm.acceptance_rate)
+        
+        max_diff = (chains[0] - chains[1]).abs().max().item()
+        print(f"      Max chain difference: {max_diff:.2e}")
+        print(f"      Acceptance rate generic: {acceptance_rates[0]:.4f}, fused: {acceptance_rates[1]:.4f}")
+        
+        all_tests_pass = max_diff < 1e-4 and abs(acceptance_rates[0] - acceptance_rates[1]) < 1e-6
+        if all_tests_pass:
+            print("   ✅ Fused step matches the generic step")
+        else:
+            print("   ❌ Fused step differs from the generic step")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ Fused MultivariateNormal step test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_cpu_compiled_rwm():
+    """Test that the compiled CPU RWM loop samples the target correctly."""
+    print("\n⚙️  Testing Compiled CPU RWM Loop...")
+    
+    try:
+        dim = 2
+        num_samples = 20000
+        np.random.seed(3)
+        target_cpu = MultivariateNormal(dim)
+        rwm_cpu = RandomWalkMH(dim, 2.38**2 / dim, target_cpu)
+        
+        # Without Numba the simulation falls back to step(), but the kernel still runs as Python
+        if rwm_cpu.can_run_compiled() != NUMBA_AVAILABLE:
+            print(f"   ❌ can_run_compiled() is {rwm_cpu.can_run_compiled()} with Numba available = {NUMBA_AVAILABLE}")
+            return False
+        
+        rwm_cpu.run_compiled(num_samples)
+        chain = rwm_cpu.get_chain()[1000:]
+        mean_error = np.linalg.norm(chain.mean(axis=0))
+        std_error = np.linalg.norm(chain.std(axis=0) - 1.0)
+        print(f"      Chain shape: {rwm_cpu.get_chain().shape}")
+        print(f"      Mean error: {mean_error:.4f}, std error: {std_error:.4f}, acceptance rate: {rwm_cpu.acceptance_rate:.4f}")
+        
+        all_tests_pass = (rwm_cpu.get_chain().shape == (num_samples + 1, dim) and
+                          mean_error < 0.15 and std_error < 0.15 and
+                          0.1 < rwm_cpu.acceptance_rate < 0.9)
+        if all_tests_pass:
+            print("   ✅ Compiled CPU RWM loop samples the target correctly")
+        else:
+            print("   ❌ Compiled CPU RWM loop statistics are off")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ Compiled CPU RWM loop test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_compiled_log_densities():
+    """Test that the compiled CPU target log densities match log(density)."""
+    print("\n📐 Testing Compiled Target Log Densities...")
+    
+    try:
+        dim = 3
+        np.random.seed(5)
+        cases = [
+            (MultivariateNormal(dim), np.random.randn(dim)),
+            (ThreeMixtureDistribution(dim), np.random.randn(dim) * 5),
+            (RoughCarpetDistribution(dim, scaling=True), np.random.randn(dim) * 5),
+            (Hypercube(dim), np.random.uniform(0.1, 0.9, dim)),
+            (IIDGamma(dim), np.random.uniform(1.0, 8.0, dim)),
+            (IIDBeta(dim), np.random.uniform(0.1, 0.9, dim)),
+        ]
+        
+        all_tests_pass = True
+        for target, x in cases:
+            compiled = target.log_density_njit(x, target.log_density_params())
+            reference = np.log(target.density(x))
+            match = np.isclose(compiled, reference, rtol=1e-6, atol=1e-8)
+            print(f"      {target.get_name()}: compiled {compiled:.6f}, reference {reference:.6f}")
+            all_tests_pass = all_tests_pass and match
+        
+        if all_tests_pass:
+            print("   ✅ Compiled log densities match the reference densities")
+        else:
+            print("   ❌ Compiled log densities differ from the reference densities")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ Compiled log density test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_density_vec():
+    """Test that the vectorized target densities used by samples_histogram match the per-point densities."""
+    print("\n📈 Testing Vectorized Target Densities...")
+    
+    try:
+        dim = 3
+        np.random.seed(13)
+        x = np.linspace(-20, 20, 401)
+        # Targets whose density() accepts a scalar: density_vec(x)[i] must equal density(x[i])
+        scalar_cases = [
+            MultivariateNormal(dim),
+            ThreeMixtureDistribution(dim),
+            RoughCarpetDistribution(dim, scaling=False),
+            RoughCarpetDistribution(dim, scaling=True),
+            IIDGamma(dim),
+        ]
+        # density() of Hypercube and IIDBeta needs a full point, so density_vec is checked
+        # against the density of the one-dimensional target
+        component_cases = [
+            (Hypercube(dim), Hypercube(1)),
+            (IIDBeta(dim), IIDBeta(1)),
+        ]
+        
+        all_tests_pass = True
+        for target in scalar_cases:
+            reference = np.array([target.density(x_i) for x_i in x])
+            match = np.allclose(target.density_vec(x), reference, rtol=1e-10, atol=1e-300)
+            print(f"      {target.get_name()}: matches density(x[i]): {match}")
+            all_tests_pass = all_tests_pass and match
+        for target, target_1d in component_cases:
+            reference = np.array([target_1d.density(np.array([x_i])) for x_i in x])
+            match = np.allclose(target.density_vec(x), reference, rtol=1e-10, atol=1e-300)
+            print(f"      {target.get_name()}: matches the 1D density: {match}")
+            all_tests_pass = all_tests_pass and match
+        
+        if all_tests_pass:
+            print("   ✅ Vectorized densities match the per-point densities")
+        else:
+            print("   ❌ Vectorized densities differ from the per-point densities")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ Vectorized density test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def test_pt_reset():
+    """Test that resetting ParallelTemperingRWM restarts every replica and the swap counters."""
+    print("\n🔁 Testing Parallel Tempering Reset...")
+    
+    try:
+        dim = 2
+        num_steps = 200
+        np.random.seed(11)
+        target_cpu = MultivariateNormal(dim)
+        pt = ParallelTemperingRWM(dim, 2.38**2 / dim, target_cpu, beta_ladder=[1.0, 0.5, 0.25])
+        initial_states = [chain.get_curr_state().copy() for chain in pt.chains]
+        
+        for _ in range(num_steps):
+            pt.step()
+        first_swap_attempts = pt.num_swap_attempts
+        first_chain_length = len(pt.get_chain())
+        
+        pt.reset()
+        reset_ok = (pt.num_swap_attempts == 0 and pt.num_acceptances == 0 and pt.acceptance_rate == 0 and
+                    pt.step_counter == 0 and pt.pt_esjd == 0 and len(pt.get_chain()) == 1 and
+                    all(chain.num_steps == 0 and chain.num_acceptances == 0 and len(chain.get_chain()) == 1
+                        for chain in pt.chains) and
+                    all(np.array_equal(chain.get_curr_state(), state)
+                        for chain, state in zip(pt.chains, initial_states)))
+        print(f"      Counters and replicas reset: {reset_ok}")
+        
+        for _ in range(num_steps):
+            pt.step()
+        # Swap steps do not add a state to the cold chain
+        expected_length = 1 + num_steps - num_steps // pt.swap_every
+        rerun_ok = (len(pt.get_chain()) == expected_length == first_chain_length and
+                    pt.num_swap_attempts == first_swap_attempts and
+                    all(chain.num_steps <= num_steps for chain in pt.chains) and
+                    pt.chain is pt.chains[0].chain)
+        print(f"      Rerun chain shape: {np.shape(pt.get_chain())}, swap attempts: {pt.num_swap_attempts}")
+        
+        all_tests_pass = reset_ok and rerun_ok
+        if all_tests_pass:
+            print("   ✅ Parallel tempering reset restarts all replicas")
+        else:
+            print("   ❌ Parallel tempering reset left stale state")
+        return all_tests_pass
+        
+    except Exception as e:
+        print(f"   ❌ Parallel tempering reset test failed: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def main():
     """Run all RWM tests."""
     print("🚀 RWM GPU Implementation Test Suite")
@@ -879,8 +1282,17 @@ def main():
         ("Performance Comparison", test_performance_comparison),
         ("Device Fallback", test_device_fallback),
         ("Funnel Distributions", test_funnel_distributions),
+        ("Super Funnel Stacked Data", test_super_funnel_stacked_data),
         ("Burn-in & Sample Counting", test_burnin_and_sample_counting),
         ("Comprehensive Distributions", test_comprehensive_target_distributions),
+        ("Batched Variance Sweep", test_batched_sweep),
+        ("CUDA Graph Replay", test_cuda_graph_replay),
+        ("bfloat16 Chain Storage", test_bf16_chain_storage),
+        ("Fused MultivariateNormal Step", test_mvn_fused_step),
+        ("Compiled CPU RWM Loop", test_cpu_compiled_rwm),
+        ("Compiled Target Log Densities", test_compiled_log_densities),
+        ("Vectorized Target Densities", test_density_vec),
+        ("Parallel Tempering Reset", test_pt_reset),
     ]
     
     results = []